@@ -24,8 +24,8 @@ echo "- Output directory: $OUTPUT_DIR"
 echo "- Config file:     $CONFIG_FILE"
 echo
 
-# Run the processor
-python -m actual_budget_transformer.main -f "$INPUT_DIR" -o "$OUTPUT_DIR" -c "$CONFIG_FILE" -v
+# Run the processor, rebuilding all monthly files in a single pass
+python -m actual_budget_transformer.main -f "$INPUT_DIR" -o "$OUTPUT_DIR" -c "$CONFIG_FILE" -v --rebuild
 
 # Check exit status
 if [ $? -eq 0 ]; then
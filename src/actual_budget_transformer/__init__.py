@@ -0,0 +1,6 @@
+"""Transform bank statements into CSV files understood by Actual Budget."""
+
+from actual_budget_transformer.processors.base_processor import InMemoryFile
+from actual_budget_transformer.transformer import RunSummary, SaveSummary, Transformer
+
+__all__ = ["InMemoryFile", "RunSummary", "SaveSummary", "Transformer"]
@@ -0,0 +1,30 @@
+"""Helpers to work with transaction amounts as integer cents."""
+
+import pandas as pd
+
+
+def to_cents(values: pd.Series) -> pd.Series:
+    """Convert amounts to integer cents, keeping missing values as <NA>."""
+    return (pd.to_numeric(values, errors="coerce") * 100).round().astype("Int64")
+
+
+def signed_amount_cents(df: pd.DataFrame) -> pd.Series:
+    """
+    Return transaction amounts in cents, positive for credits.
+
+    Debits are negative in some exports and positive in others, so only
+    magnitudes are used.
+    """
+    credit = pd.to_numeric(df["credit"], errors="coerce").fillna(0).abs()
+    debit = pd.to_numeric(df["debit"], errors="coerce").fillna(0).abs()
+    return ((credit - debit) * 100).round().astype("int64")
+
+
+def signed_cents(debit: str, credit: str) -> int:
+    """
+    Return the amount in cents of a transaction read from a CSV row, positive for
+    credits. Same as `signed_amount_cents`, for a single row.
+    """
+    credit_value = abs(float(credit)) if credit else 0.0
+    debit_value = abs(float(debit)) if debit else 0.0
+    return int(round((credit_value - debit_value) * 100))
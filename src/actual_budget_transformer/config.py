@@ -1,5 +1,6 @@
 """Configuration management for actual_budget_transformer."""
 
+import copy
 import os
 from pathlib import Path
 from typing import Dict, Optional
@@ -29,8 +30,6 @@ class _ConfigManager:
         if self._config_cache is not None and config_path_override is None:
             return self._config_cache
 
-        config = BASE_CONFIG.copy()
-
         # Determine which config path to use
         config_path = config_path_override or os.environ.get(CONFIG_PATH_ENV)
 
@@ -40,29 +39,46 @@ class _ConfigManager:
                 "Using default settings. Please copy config.template.yml to create your configuration.",
                 CONFIG_PATH_ENV,
             )
-            self._config_cache = config
-            return self._config_cache
-
-        try:
-            path = Path(config_path)
-            if path.exists():
-                with open(path, "r", encoding="utf-8") as f:
-                    loaded_config = yaml.safe_load(f)
-                    if loaded_config:
-                        logger.info("Loaded configuration from %s", path)
-                        config.update(loaded_config)
-            else:
-                logger.warning(
-                    "Config file not found at %s. Using default settings.", path
-                )
-        except (OSError, yaml.YAMLError) as e:
-            logger.error("Failed to load config from %s: %s", config_path, e)
 
         # Cache the loaded configuration
-        self._config_cache = config
+        self._config_cache = read_config(config_path)
         return self._config_cache
 
 
+def read_config(config_path: Optional[str] = None) -> Dict:
+    """
+    Read configuration from a YAML file without touching the cached configuration.
+
+    This is what embedders should use to build independent configurations,
+    for instance one per `Transformer` instance.
+
+    Args:
+        config_path: Path to the config file. Default settings are returned when omitted.
+
+    Returns:
+        A dictionary containing the configuration.
+    """
+    config = copy.deepcopy(BASE_CONFIG)
+
+    if not config_path:
+        return config
+
+    try:
+        path = Path(config_path)
+        if path.exists():
+            with open(path, "r", encoding="utf-8") as f:
+                loaded_config = yaml.safe_load(f)
+                if loaded_config:
+                    logger.info("Loaded configuration from %s", path)
+                    config.update(loaded_config)
+        else:
+            logger.warning("Config file not found at %s. Using default settings.", path)
+    except (OSError, yaml.YAMLError) as e:
+        logger.error("Failed to load config from %s: %s", config_path, e)
+
+    return config
+
+
 # Singleton instance to manage configuration state
 _config_manager = _ConfigManager()
 
@@ -85,32 +101,37 @@ def load_config(config_path_override: Optional[str] = None) -> Dict:
     return _config_manager.load(config_path_override)
 
 
-def get_processor_config(processor_name: str) -> Dict:
+def get_processor_config(processor_name: str, config: Optional[Dict] = None) -> Dict:
     """
     Get configuration for a specific processor.
 
     Args:
         processor_name: Name of the processor (e.g., 'ubs_csv')
+        config: Configuration to read from. Defaults to the cached configuration.
 
     Returns:
         Dict containing processor configuration
     """
-    config = load_config()
+    if config is None:
+        config = load_config()
     return config.get("processors", {}).get(processor_name, {})
 
 
-def get_account_name(iban: str, processor_name: str = "ubs_csv") -> str:
+def get_account_name(
+    iban: str, processor_name: str = "ubs_csv", config: Optional[Dict] = None
+) -> str:
     """
     Get friendly name for an IBAN from a specific processor's configuration.
 
     Args:
         iban: The IBAN to look up
         processor_name: Name of the processor to get account mappings from
+        config: Configuration to read from. Defaults to the cached configuration.
 
     Returns:
         Friendly name if found, cleaned IBAN if not found
     """
-    processor_config = get_processor_config(processor_name)
+    processor_config = get_processor_config(processor_name, config)
 
     # Clean the IBAN for comparison
     clean_iban = iban.replace(" ", "")
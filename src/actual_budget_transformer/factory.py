@@ -6,17 +6,36 @@ to select the appropriate processor for a given file. Each processor must implem
 the BaseProcessor interface, including a class method `can_process` to determine if
 it can handle a specific file.
 
+Processors also declare a cheap `signature`: extensions, encoding, first line and
+header labels. The registry indexes those signatures, reads one header prefix per
+file and matches it against the index, so that the full `can_process` validation
+only runs for candidate formats. Unsupported files are usually rejected without
+any processor opening them.
+
 Usage:
-    from factory import get_processor_for_file
+    from factory import ProcessorRegistry, PROCESSORS
 
-    processor = get_processor_for_file(file_path)
-    df = processor.process(file_path)
+    registry = ProcessorRegistry(PROCESSORS, config)
+    processor = registry.get_processor(file_path)
+    results = processor.process(file_path)
 
 Raises:
     ValueError: If no suitable processor is found for the provided file.
 """
 
-from actual_budget_transformer.processors.base_processor import BaseProcessor
+import codecs
+import os
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple, Type
+from actual_budget_transformer.config import load_config
+from actual_budget_transformer.logging_config import logger
+from actual_budget_transformer.processors.base_processor import (
+    BaseProcessor,
+    FileSource,
+    ProcessorSignature,
+    open_source,
+    source_name,
+)
 from actual_budget_transformer.processors.ubs_csv_transaction_processor import (
     UBSCSVTransactionProcessor,
 )
@@ -30,13 +49,149 @@ PROCESSORS = [
     # Add more processors here
 ]
 
+# Number of bytes read from each file to match signatures
+HEADER_PREFIX_SIZE = 4096
+
+# Registration order, processor class and signature
+_Entry = Tuple[int, Type[BaseProcessor], Optional[ProcessorSignature]]
+
+
+def _decode_header(prefix: bytes, encoding: str) -> Optional[str]:
+    """Decode a header prefix, tolerating a character cut at the end. None if it fails."""
+    try:
+        decoder = codecs.getincrementaldecoder(encoding)()
+        return decoder.decode(prefix, final=False)
+    except (LookupError, UnicodeDecodeError):
+        return None
+
+
+class ProcessorRegistry:
+    """
+    Index of processors by signature.
+
+    Args:
+        processors: Processor classes, in priority order.
+        config: Configuration handed to the processors. Defaults to the cached
+            application configuration.
+    """
+
+    def __init__(
+        self,
+        processors: Iterable[Type[BaseProcessor]] = (),
+        config: Optional[Dict] = None,
+    ):
+        self.config = config if config is not None else load_config()
+        self._count = 0
+        # Processors by extension, and those accepting any extension
+        self._by_extension: Dict[str, List[_Entry]] = defaultdict(list)
+        self._any_extension: List[_Entry] = []
+        # Processors by (encoding, first line), and those without a first line
+        self._by_first_line: Dict[Tuple[str, str], List[_Entry]] = defaultdict(list)
+        self._first_line_encodings: List[str] = []
+        for processor_cls in processors:
+            self.register(processor_cls)
+
+    def register(self, processor_cls: Type[BaseProcessor]) -> None:
+        """Add a processor, after those already registered."""
+        try:
+            signature = processor_cls.signature(self.config)
+        except KeyError as e:
+            logger.debug(
+                "Not registering %s: missing configuration %s",
+                processor_cls.__name__,
+                e,
+            )
+            return
+
+        entry = (self._count, processor_cls, signature)
+        self._count += 1
+
+        if signature is None or not signature.extensions:
+            self._any_extension.append(entry)
+        else:
+            for extension in signature.extensions:
+                self._by_extension[extension.lower()].append(entry)
+
+        if signature is not None and signature.first_line is not None:
+            self._by_first_line[(signature.encoding, signature.first_line)].append(
+                entry
+            )
+            if signature.encoding not in self._first_line_encodings:
+                self._first_line_encodings.append(signature.encoding)
+
+    def candidates(self, file_path: FileSource) -> List[Type[BaseProcessor]]:
+        """
+        Return the processors whose signature matches the file, in priority order.
+
+        The file is opened at most once, to read a prefix of its header.
+        """
+        _, extension = os.path.splitext(source_name(file_path))
+        entries = self._by_extension.get(extension.lower(), []) + self._any_extension
+        if not entries:
+            logger.debug("Rejected %s: no processor for this extension", file_path)
+            return []
+
+        try:
+            with open_source(file_path) as f:
+                prefix = f.read(HEADER_PREFIX_SIZE)
+        except OSError as e:
+            logger.debug("Failed to read %s: %s", file_path, e)
+            return []
+
+        headers: Dict[str, Optional[str]] = {}
+
+        def header(encoding: str) -> Optional[str]:
+            if encoding not in headers:
+                headers[encoding] = _decode_header(prefix, encoding)
+            return headers[encoding]
+
+        # Processors matching the first line, looked up once per encoding
+        first_line_matches = set()
+        for encoding in self._first_line_encodings:
+            text = header(encoding)
+            if text is not None:
+                first_line = text.split("\n", 1)[0].strip()
+                first_line_matches.update(
+                    entry[0]
+                    for entry in self._by_first_line.get((encoding, first_line), [])
+                )
+
+        candidates = []
+        for order, processor_cls, signature in sorted(entries, key=lambda e: e[0]):
+            if signature is not None:
+                if signature.first_line is not None and order not in first_line_matches:
+                    continue
+                text = header(signature.encoding)
+                if text is None or not all(
+                    label in text for label in signature.header_labels
+                ):
+                    continue
+            candidates.append(processor_cls)
+        return candidates
+
+    def get_processor(self, file_path: FileSource) -> BaseProcessor:
+        """
+        Returns an instance of the first processor that can handle the given file.
+
+        Raises:
+            ValueError: If no suitable processor is found.
+        """
+        for processor_cls in self.candidates(file_path):
+            if processor_cls.can_process(file_path, self.config):
+                return processor_cls(self.config)
+        raise ValueError(f"No processor found for file: {file_path}")
+
 
-def get_processor_for_file(file_path: str) -> BaseProcessor:
+def get_processor_for_file(
+    file_path: FileSource, config: Optional[Dict] = None
+) -> BaseProcessor:
     """
     Returns an instance of the first processor that can handle the given file.
 
     Args:
-        file_path (str): Path to the file to be processed.
+        file_path (FileSource): Path to the file to be processed, or an in-memory file.
+        config (dict, optional): Configuration handed to the processors.
+            Defaults to the cached application configuration.
 
     Returns:
         BaseProcessor: An instance of a processor capable of handling the file.
@@ -44,7 +199,4 @@ def get_processor_for_file(file_path: str) -> BaseProcessor:
     Raises:
         ValueError: If no suitable processor is found.
     """
-    for processor_cls in PROCESSORS:
-        if processor_cls.can_process(file_path):
-            return processor_cls()
-    raise ValueError(f"No processor found for file: {file_path}")
+    return ProcessorRegistry(PROCESSORS, config).get_processor(file_path)
@@ -3,16 +3,21 @@
 import logging
 import sys
 
+LOGGER_NAME = "actual_budget_transformer"
+
 
 def setup_logging(level=logging.INFO):
     """
     Configure logging for the actual_budget_transformer package.
 
+    Only the CLI calls this. Embedding applications keep control of their own
+    logging configuration.
+
     Args:
         level: The logging level to use. Defaults to INFO.
     """
     # Create logger
-    logger = logging.getLogger("actual_budget_transformer")
+    logger = logging.getLogger(LOGGER_NAME)
     logger.setLevel(level)
 
     # Remove any existing handlers to avoid duplicates
@@ -34,5 +39,5 @@ def setup_logging(level=logging.INFO):
     return logger
 
 
-# Create a default logger instance
-logger = setup_logging()
+# Package logger, left unconfigured until setup_logging() is called
+logger = logging.getLogger(LOGGER_NAME)
@@ -0,0 +1,253 @@
+"""
+Payee normalization and categorization rules.
+
+Rules come from the `payee_rules` section of the configuration. Each rule maps
+either a literal substring (`match`) or a regular expression (`pattern`) to a
+clean payee and an optional category. Both are case insensitive.
+
+Literal rules are compiled into a single regular expression rendered as a trie,
+so matching cost depends on the payee length rather than on the number of rules.
+Pattern rules are joined into a second expression. When it matches, the pattern
+that matched is found among chunks of patterns tried at the match position
+only. Both expressions run once per unique payee string, and the outcome is
+broadcast back to every row.
+
+When several rules match a payee, the one matching earliest in the string wins.
+At the same position literal rules win over patterns, longer literals win over
+shorter ones, and patterns are tried in the order they are listed.
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+import pandas as pd
+
+# Output column keeping the payee as found in the input, so that transactions
+# are recognized across runs whatever the rules in force
+ORIGINAL_PAYEE_COLUMN = "original_payee"
+
+# Prefix of the groups telling which literal matched in the trie expression
+_LITERAL_GROUP = "_l"
+
+# Number of patterns tried together when looking for the pattern that matched.
+# Patterns are not wrapped in groups, as saving group marks at each alternative
+# makes searches quadratic in the number of patterns.
+_PATTERN_CHUNK_SIZE = 32
+
+# Backreferences and conditionals, along with escaped backslashes to skip them
+_GROUP_REFERENCE = re.compile(r"\\\\|\\[1-9]|\\g<|\(\?P=|\(\?\(")
+
+
+@dataclass(frozen=True)
+class PayeeRule:
+    """
+    A single payee rule.
+
+    Attributes
+    ----------
+    payee : str
+        Clean payee written to the output
+    match : str, optional
+        Literal substring to look for
+    pattern : str, optional
+        Regular expression to search for, used when `match` is not set
+    category : str, optional
+        Category written to the output
+    """
+
+    payee: str
+    match: Optional[str] = None
+    pattern: Optional[str] = None
+    category: Optional[str] = None
+
+
+def _trie_regex(literals: Sequence[str]) -> str:
+    """
+    Render literals as a regex trie, preferring the longest literal.
+
+    Each literal ends with an empty group named after its index, so the match
+    reports which literal was found through `lastgroup`.
+    """
+    trie: Dict = {}
+    for index, literal in enumerate(literals):
+        node = trie
+        for char in literal:
+            node = node.setdefault(char, {})
+        node.setdefault("", index)
+
+    def render(node: Dict) -> str:
+        branches = [re.escape(char) + render(node[char]) for char in node if char]
+        if "" in node:
+            branches.append(f"(?P<{_LITERAL_GROUP}{node['']}>)")
+        return branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+
+    return render(trie)
+
+
+def _join_patterns(patterns: Sequence[Tuple[PayeeRule, re.Pattern]]) -> re.Pattern:
+    """Compile patterns into a single alternation, without wrapping groups."""
+    return re.compile(
+        "|".join(f"(?:{rule.pattern})" for rule, _ in patterns), re.IGNORECASE
+    )
+
+
+def _check_pattern(pattern: str) -> re.Pattern:
+    """
+    Compile a pattern, rejecting those that cannot be embedded in the combined
+    expression.
+
+    Raises:
+        ValueError: If the pattern is invalid, refers to groups or sets global flags.
+    """
+    try:
+        regex = re.compile(pattern, re.IGNORECASE)
+        # Global inline flags are only valid at the start of the combined expression
+        re.compile(f"(?:{pattern})", re.IGNORECASE)
+    except re.error as e:
+        raise ValueError(f"Invalid payee rule pattern '{pattern}': {e}") from e
+
+    # Group numbers shift once the pattern is embedded, so references would
+    # silently point to another group
+    for reference in _GROUP_REFERENCE.finditer(pattern):
+        if reference.group() != "\\\\":
+            raise ValueError(
+                f"Payee rule pattern '{pattern}' refers to a group, "
+                "which is not supported"
+            )
+    return regex
+
+
+class PayeeRules:
+    """
+    Compiled set of payee rules.
+
+    Args:
+        rules: Rules, in priority order.
+
+    Raises:
+        ValueError: If a rule pattern is not a valid regular expression, refers
+            to groups, sets global flags or reuses the group name of another
+            pattern.
+    """
+
+    def __init__(self, rules: Sequence[PayeeRule]):
+        self.rules = list(rules)
+
+        # Literal rules are found through the name of the group that matched
+        self._literal_rules: Dict[str, PayeeRule] = {}
+        literals: Dict[str, int] = {}
+        patterns: List[Tuple[PayeeRule, re.Pattern]] = []
+        group_names = set()
+        for rule in self.rules:
+            if rule.match is not None:
+                literal = rule.match.lower()
+                if literal not in literals:
+                    literals[literal] = len(literals)
+                    self._literal_rules[f"{_LITERAL_GROUP}{literals[literal]}"] = rule
+            else:
+                regex = _check_pattern(rule.pattern)
+                for name in regex.groupindex:
+                    if name in group_names:
+                        raise ValueError(
+                            f"Payee rule pattern '{rule.pattern}' reuses the group "
+                            f"name '{name}' of another pattern"
+                        )
+                    group_names.add(name)
+                patterns.append((rule, regex))
+
+        self._literal_regex: Optional[re.Pattern] = None
+        if literals:
+            self._literal_regex = re.compile(_trie_regex(list(literals)), re.IGNORECASE)
+
+        self._pattern_regex: Optional[re.Pattern] = None
+        self._pattern_chunks: List[Tuple[re.Pattern, List]] = []
+        if patterns:
+            try:
+                self._pattern_regex = _join_patterns(patterns)
+                for start in range(0, len(patterns), _PATTERN_CHUNK_SIZE):
+                    chunk = patterns[start : start + _PATTERN_CHUNK_SIZE]
+                    self._pattern_chunks.append((_join_patterns(chunk), chunk))
+            except re.error as e:
+                raise ValueError(f"Failed to compile payee rules: {e}") from e
+
+    @classmethod
+    def from_config(cls, config: Dict) -> "PayeeRules":
+        """
+        Build rules from the `payee_rules` section of the configuration.
+
+        Raises:
+            ValueError: If a rule is malformed.
+        """
+        rules = []
+        for index, entry in enumerate(config.get("payee_rules") or [], start=1):
+            if not isinstance(entry, dict) or not entry.get("payee"):
+                raise ValueError(f"Payee rule #{index} has no 'payee'")
+            if bool(entry.get("match")) == bool(entry.get("pattern")):
+                raise ValueError(
+                    f"Payee rule #{index} needs exactly one of 'match' or 'pattern'"
+                )
+            rules.append(
+                PayeeRule(
+                    payee=entry["payee"],
+                    match=entry.get("match"),
+                    pattern=entry.get("pattern"),
+                    category=entry.get("category"),
+                )
+            )
+        return cls(rules)
+
+    def __len__(self) -> int:
+        return len(self.rules)
+
+    def match(self, payee: str) -> Optional[PayeeRule]:
+        """Return the rule applying to a payee, if any."""
+        literal = self._literal_regex.search(payee) if self._literal_regex else None
+        pattern = self._pattern_regex.search(payee) if self._pattern_regex else None
+        if literal is not None and (
+            pattern is None or literal.start() <= pattern.start()
+        ):
+            return self._literal_rules[literal.lastgroup]
+        if pattern is None:
+            return None
+
+        # Patterns are tried in order at the match position, one chunk at a time
+        position = pattern.start()
+        for chunk_regex, chunk in self._pattern_chunks:
+            if chunk_regex.match(payee, position):
+                for rule, regex in chunk:
+                    if regex.match(payee, position):
+                        return rule
+        return None
+
+    def apply(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Normalize payees and add `category` and `original_payee` columns.
+
+        Rules are evaluated once per unique payee. Payees no rule applies to
+        are kept as is, with an empty category.
+
+        Args:
+            df: DataFrame with a `payee` column
+
+        Returns:
+            A new DataFrame. The input is returned unchanged when there are no rules.
+        """
+        if not self.rules:
+            return df
+
+        matches = {}
+        for payee in df["payee"].dropna().unique():
+            rule = self.match(str(payee))
+            if rule is not None:
+                matches[payee] = rule
+
+        payees = df["payee"].map({payee: rule.payee for payee, rule in matches.items()})
+        categories = df["payee"].map(
+            {payee: rule.category or "" for payee, rule in matches.items()}
+        )
+
+        result = df.copy()
+        result["payee"] = payees.where(payees.notna(), df["payee"])
+        result["category"] = categories.fillna("")
+        result[ORIGINAL_PAYEE_COLUMN] = df["payee"]
+        return result
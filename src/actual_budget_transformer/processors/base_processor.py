@@ -1,7 +1,51 @@
 # pylint: disable=C0114
+import io
+import os
 from abc import ABC, abstractmethod
-from dataclasses import dataclass
-from typing import Any
+from dataclasses import dataclass, field
+from typing import IO, Any, Dict, List, Optional, Tuple
+
+
+@dataclass(frozen=True)
+class InMemoryFile:
+    """
+    File content held in memory, for sources that do not live on disk.
+
+    Attributes
+    ----------
+    name : str
+        File name, used for extension checks and log messages
+    content : bytes
+        Raw file content
+    """
+
+    name: str
+    content: bytes
+
+    def __str__(self) -> str:
+        return self.name
+
+
+# Anything a processor accepts as input: a path on disk or an in-memory file
+FileSource = str | os.PathLike | InMemoryFile
+
+
+def source_name(source: FileSource) -> str:
+    """Return the file name of a source, as used for extension checks."""
+    if isinstance(source, InMemoryFile):
+        return source.name
+    return os.fspath(source)
+
+
+def open_source(source: FileSource) -> IO[bytes]:
+    """
+    Open a source as a fresh binary stream, positioned at its start.
+
+    Each call returns a new stream, so a source can be read several times.
+    """
+    if isinstance(source, InMemoryFile):
+        return io.BytesIO(source.content)
+    return open(source, "rb")
 
 
 @dataclass
@@ -21,6 +65,33 @@ class ProcessingResult:
 
     data: Any
     output_prefix: str
+    metadata: Dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass(frozen=True)
+class ProcessorSignature:
+    """
+    Cheap checks a file must pass before a processor fully validates it.
+
+    All checks run against a prefix of the file, read once and shared by every
+    processor.
+
+    Attributes
+    ----------
+    extensions : tuple of str
+        Accepted file extensions, lowercase with the leading dot. Empty accepts any.
+    encoding : str
+        Encoding the header must decode with
+    first_line : str, optional
+        Exact content of the first line, stripped
+    header_labels : tuple of str
+        Labels that must all appear in the header
+    """
+
+    extensions: Tuple[str, ...] = ()
+    encoding: str = "utf-8"
+    first_line: Optional[str] = None
+    header_labels: Tuple[str, ...] = ()
 
 
 class BaseProcessor(ABC):
@@ -33,25 +104,45 @@ class BaseProcessor(ABC):
 
     Methods
     -------
-    can_process(cls, file_path) -> bool
+    signature(cls, config) -> ProcessorSignature or None
+        Class method describing cheap checks that preselect candidate files.
+
+    can_process(cls, file_path, config=None) -> bool
         Class method that returns True if the processor can handle the given file.
 
-    process(cls, file_path) -> ProcessingResult
-        Parse and process the specified file.
+    process(cls, file_path) -> list of ProcessingResult
+        Parse and process the specified file, with one result per account it contains.
     """
 
+    @classmethod
+    def signature(cls, config: Dict) -> Optional[ProcessorSignature]:
+        """
+        Return the signature of the files this processor handles.
+
+        The factory only calls `can_process` on files matching the signature.
+        None makes every file a candidate.
+
+        Raises:
+            KeyError: If the processor is missing from the configuration.
+        """
+        return None
+
     @classmethod
     @abstractmethod
-    def can_process(cls, file_path) -> bool:
-        """Return True if this processor can handle the file."""
+    def can_process(cls, file_path: FileSource, config: Optional[Dict] = None) -> bool:
+        """
+        Return True if this processor can handle the file.
+
+        `config` defaults to the cached application configuration.
+        """
 
     @abstractmethod
-    def process(self, file_path) -> ProcessingResult:
+    def process(self, file_path: FileSource) -> List[ProcessingResult]:
         """
         Parse and process the file.
 
         Returns
         -------
-        ProcessingResult
-            Container with processed data and metadata
+        list of ProcessingResult
+            One container with processed data and metadata per account in the file
         """
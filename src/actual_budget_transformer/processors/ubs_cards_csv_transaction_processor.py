@@ -1,27 +1,44 @@
 from dataclasses import dataclass
+from typing import Dict, List, Optional
 import pandas as pd
-from actual_budget_transformer.processors.base_processor import BaseProcessor, ProcessingResult
+from actual_budget_transformer.processors.base_processor import (
+    BaseProcessor,
+    FileSource,
+    ProcessingResult,
+    ProcessorSignature,
+    open_source,
+)
 from actual_budget_transformer.config import load_config
 
+# Card number of rows with neither a card nor an account number
+UNKNOWN_CARD_NUMBER = "unknown"
+
 
 @dataclass
 class UBSCardsCSVTransactionProcessor(BaseProcessor):
     """Processor for UBS card transaction CSV files."""
 
-    def _validate_headers(self, file_path: str, config: dict) -> bool:
+    config: Optional[Dict] = None
+
+    def _get_config(self) -> Dict:
+        """Return the configuration given at creation, or the cached one."""
+        return self.config if self.config is not None else load_config()
+
+    def _validate_headers(self, file_path: FileSource, config: dict) -> bool:
         """Validate the CSV headers match expected format."""
         csv_settings = config["processors"]["ubs_cards"]["csv_settings"]
         expected_columns = config["processors"]["ubs_cards"]["expected_columns"]
 
         try:
             # Read just the header row
-            df = pd.read_csv(
-                file_path,
-                encoding=csv_settings["encoding"],
-                sep=csv_settings["separator"],
-                skiprows=csv_settings["header_row"] - 1,
-                nrows=1,
-            )
+            with open_source(file_path) as f:
+                df = pd.read_csv(
+                    f,
+                    encoding=csv_settings["encoding"],
+                    sep=csv_settings["separator"],
+                    skiprows=csv_settings["header_row"] - 1,
+                    nrows=1,
+                )
 
             # Check if all expected columns are present
             return all(col in df.columns for col in expected_columns)
@@ -29,26 +46,35 @@ class UBSCardsCSVTransactionProcessor(BaseProcessor):
             return False
 
     @classmethod
-    def can_process(cls, file_path: str) -> bool:
+    def signature(cls, config: Dict) -> ProcessorSignature:
+        """Describe the sep=; line and column headers of card statements."""
+        processor_config = config["processors"]["ubs_cards"]
+        return ProcessorSignature(
+            encoding=processor_config["csv_settings"]["encoding"],
+            first_line="sep=;",
+            header_labels=tuple(processor_config["expected_columns"]),
+        )
+
+    @classmethod
+    def can_process(cls, file_path: FileSource, config: Optional[Dict] = None) -> bool:
         """Check if this processor can handle the file."""
         try:
             # First check for the sep=; line
-            with open(file_path, "r", encoding="iso-8859-1") as f:
-                first_line = f.readline().strip()
+            with open_source(file_path) as f:
+                first_line = f.readline().decode("iso-8859-1").strip()
                 if first_line != "sep=;":
                     return False
 
             # Then validate the headers
-            config = load_config()
             # Create instance for validation
-            instance = cls()
-            return instance._validate_headers(file_path, config)
+            instance = cls(config)
+            return instance._validate_headers(file_path, instance._get_config())
         except Exception:  # pylint: disable=broad-except
             return False
 
-    def process(self, file_path: str) -> ProcessingResult:
-        """Process a UBS cards CSV file."""
-        config = load_config()
+    def process(self, file_path: FileSource) -> List[ProcessingResult]:
+        """Process a UBS cards CSV file, with one result per card."""
+        config = self._get_config()
         processor_config = config["processors"]["ubs_cards"]
         csv_settings = processor_config["csv_settings"]
         account_names = processor_config["account_names"]
@@ -59,18 +85,25 @@ class UBSCardsCSVTransactionProcessor(BaseProcessor):
             raise ValueError("Invalid file format: unexpected column headers")
 
         # Read CSV using configured settings
-        df = pd.read_csv(
-            file_path,
-            encoding=csv_settings["encoding"],
-            sep=csv_settings["separator"],
-            skiprows=csv_settings["header_row"] - 1,
-            parse_dates=["Date d'achat"],
-            date_parser=lambda x: pd.to_datetime(x, format=date_format),
-        )
+        with open_source(file_path) as f:
+            df = pd.read_csv(
+                f,
+                encoding=csv_settings["encoding"],
+                sep=csv_settings["separator"],
+                skiprows=csv_settings["header_row"] - 1,
+                dtype={"Numéro de compte": str, "Numéro de carte": str},
+            )
+
+        # Parse all purchase dates at once
+        df["Date d'achat"] = pd.to_datetime(df["Date d'achat"], format=date_format)
 
-        # Get the card number and map it to an account name
-        card_number = df["Numéro de carte"].iloc[0]
-        account_name = account_names.get(card_number, f"card_{card_number}")
+        # Rows without a card number, such as bill payments, belong to the account.
+        # Rows without either are kept together rather than dropped
+        card_numbers = (
+            df["Numéro de carte"]
+            .fillna(df["Numéro de compte"])
+            .fillna(UNKNOWN_CARD_NUMBER)
+        )
 
         # Normalize column names and select relevant ones
         result = pd.DataFrame(
@@ -83,7 +116,14 @@ class UBSCardsCSVTransactionProcessor(BaseProcessor):
             }
         )
 
-        return ProcessingResult(
-            data=result,
-            output_prefix=f"ubs_cards_{account_name.lower().replace(' ', '_')}",
-        )
+        # Split the statement by card, mapping each card number to an account name
+        results = []
+        for card_number, card_df in result.groupby(card_numbers, sort=False):
+            account_name = account_names.get(card_number, f"card_{card_number}")
+            results.append(
+                ProcessingResult(
+                    data=card_df.reset_index(drop=True),
+                    output_prefix=f"ubs_cards_{account_name.lower().replace(' ', '_')}",
+                )
+            )
+        return results
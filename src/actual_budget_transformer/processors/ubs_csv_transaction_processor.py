@@ -2,20 +2,61 @@
 Processor for UBS CSV Transactions extracted from accounts (not UBS cards)
 """
 
-import os
+from typing import Dict, List, Optional
 import pandas as pd
-from actual_budget_transformer.processors.base_processor import BaseProcessor, ProcessingResult
+from actual_budget_transformer.amounts import signed_amount_cents, to_cents
+from actual_budget_transformer.processors.base_processor import (
+    BaseProcessor,
+    FileSource,
+    ProcessingResult,
+    ProcessorSignature,
+    open_source,
+    source_name,
+)
 from actual_budget_transformer.logging_config import logger
 from actual_budget_transformer.config import get_account_name, get_processor_config
 
+# Header fields, in the order of `expected_header_labels` when given as a list
+HEADER_FIELDS = [
+    "account_number",
+    "iban",
+    "start",
+    "end",
+    "opening_balance",
+    "closing_balance",
+    "currency",
+    "transaction_count",
+]
+
+
+def header_labels_by_field(labels) -> Dict[str, str]:
+    """
+    Return the header label of each field.
+
+    Args:
+        labels: Mapping of field to label, or list of labels in `HEADER_FIELDS` order
+
+    Raises:
+        ValueError: If a field has no label.
+    """
+    if not isinstance(labels, dict):
+        labels = dict(zip(HEADER_FIELDS, labels))
+    missing = [field for field in HEADER_FIELDS if field not in labels]
+    if missing:
+        raise ValueError(f"No expected header label for {', '.join(missing)}")
+    return labels
+
 
 # pylint: disable=C0115
 class UBSCSVTransactionProcessor(BaseProcessor):
     """Process UBS CSV transaction files."""
 
-    def __init__(self):
+    def __init__(self, config: Optional[Dict] = None):
+        # Keep the application configuration for account name lookups
+        self.app_config = config
+
         # Get processor configuration
-        self.config = get_processor_config("ubs_csv")
+        self.config = get_processor_config("ubs_csv", config)
 
         # CSV settings from config
         self.csv_settings = self.config["csv_settings"]
@@ -25,31 +66,47 @@ class UBSCSVTransactionProcessor(BaseProcessor):
         self.separator = self.csv_settings["separator"]
 
         # Expected labels from config
-        self.expected_header_labels = self.config["expected_header_labels"]
+        self.header_labels = header_labels_by_field(
+            self.config["expected_header_labels"]
+        )
+        self.expected_header_labels = list(self.header_labels.values())
         self.expected_transaction_labels = self.config["expected_transaction_labels"]
 
         # Date format from config
         self.date_format = self.config["date_format"]
 
     @classmethod
-    def can_process(cls, file_path) -> bool:
-        _, ext = os.path.splitext(file_path)
-        if ext.lower() != ".csv":
+    def signature(cls, config: Dict) -> ProcessorSignature:
+        processor_config = get_processor_config("ubs_csv", config)
+        return ProcessorSignature(
+            extensions=(".csv",),
+            encoding=processor_config["csv_settings"]["encoding"],
+            header_labels=tuple(
+                header_labels_by_field(
+                    processor_config["expected_header_labels"]
+                ).values()
+            ),
+        )
+
+    @classmethod
+    def can_process(cls, file_path: FileSource, config: Optional[Dict] = None) -> bool:
+        if not source_name(file_path).lower().endswith(".csv"):
             logger.debug("Rejected %s: file has no .csv extension", file_path)
             return False
 
         # Create temporary instance to get config
-        instance = cls()
+        instance = cls(config)
 
         try:
             # Read header rows
-            rows = pd.read_csv(
-                file_path,
-                sep=instance.separator,
-                nrows=instance.header_rows,
-                header=None,
-                encoding=instance.encoding,
-            )
+            with open_source(file_path) as f:
+                rows = pd.read_csv(
+                    f,
+                    sep=instance.separator,
+                    nrows=instance.header_rows,
+                    header=None,
+                    encoding=instance.encoding,
+                )
         except (FileNotFoundError, pd.errors.ParserError, UnicodeDecodeError) as e:
             logger.debug("Failed to read %s: %s", file_path, e)
             return False
@@ -63,27 +120,27 @@ class UBSCSVTransactionProcessor(BaseProcessor):
             )
             return False
 
-        for i, label in enumerate(instance.expected_header_labels):
-            actual = rows.iloc[i, 0].strip()
-            if actual != label:
-                logger.debug(
-                    "Rejected %s: header label mismatch at row %d (expected '%s', found '%s')",
-                    file_path,
-                    i + 1,
-                    label,
-                    actual,
-                )
-                return False
+        # Values are looked up by label, so the order of the rows does not matter
+        actual_labels = rows.iloc[:, 0].astype(str).str.strip().tolist()
+        if sorted(actual_labels) != sorted(instance.expected_header_labels):
+            logger.debug(
+                "Rejected %s: header labels mismatch.\nExpected: %s\nFound: %s",
+                file_path,
+                instance.expected_header_labels,
+                actual_labels,
+            )
+            return False
 
         try:
             # Read transaction headers
-            rows = pd.read_csv(
-                file_path,
-                sep=instance.separator,
-                skiprows=instance.header_rows,
-                encoding=instance.encoding,
-                nrows=0,  # Only read the header
-            )
+            with open_source(file_path) as f:
+                rows = pd.read_csv(
+                    f,
+                    sep=instance.separator,
+                    skiprows=instance.header_rows,
+                    encoding=instance.encoding,
+                    nrows=0,  # Only read the header
+                )
         except (FileNotFoundError, pd.errors.ParserError, UnicodeDecodeError) as e:
             logger.debug("Failed to read %s: %s", file_path, e)
             return False
@@ -102,35 +159,48 @@ class UBSCSVTransactionProcessor(BaseProcessor):
         logger.debug("%s accepted as UBS CSV transaction file", file_path)
         return True
 
-    def process(self, file_path):
+    def process(self, file_path: FileSource) -> List[ProcessingResult]:
         logger.debug("Processing UBS CSV file: %s", file_path)
         try:
             # Read header rows
-            header_rows = pd.read_csv(
-                file_path,
-                sep=self.separator,
-                nrows=self.header_rows,
-                header=None,
-                encoding=self.encoding,
-            )
+            with open_source(file_path) as f:
+                header_rows = pd.read_csv(
+                    f,
+                    sep=self.separator,
+                    nrows=self.header_rows,
+                    header=None,
+                    encoding=self.encoding,
+                )
         except (FileNotFoundError, pd.errors.ParserError, UnicodeDecodeError) as e:
             logger.error("Failed to read %s: %s", file_path, e)
             raise ValueError(f"Failed to read the file: {e}") from e
 
-        # Read header labels
-        account_number = header_rows.iloc[0, 1]
-        iban = header_rows.iloc[1, 1]
+        # Read header values by label
+        header = pd.Series(
+            header_rows.iloc[:, 1].to_numpy(),
+            index=header_rows.iloc[:, 0].astype(str).str.strip(),
+        )
+        missing = [
+            label for label in self.expected_header_labels if label not in header
+        ]
+        if missing:
+            raise ValueError(f"Missing header labels: {', '.join(missing)}")
+        header = {field: header[label] for field, label in self.header_labels.items()}
+
+        account_number = header["account_number"]
+        iban = header["iban"]
         logger.debug("Processing account %s (IBAN: %s)", account_number, iban)
 
         try:
             # Read transactions with date column as object first
-            df = pd.read_csv(
-                file_path,
-                sep=self.separator,
-                skiprows=self.header_rows,
-                encoding=self.encoding,
-                dtype={"Date de transaction": "object"},
-            )
+            with open_source(file_path) as f:
+                df = pd.read_csv(
+                    f,
+                    sep=self.separator,
+                    skiprows=self.header_rows,
+                    encoding=self.encoding,
+                    dtype={"Date de transaction": "object"},
+                )
 
             # Then convert the date column using to_datetime
             df["Date de transaction"] = pd.to_datetime(
@@ -158,6 +228,35 @@ class UBSCSVTransactionProcessor(BaseProcessor):
             "other_info",
         ]
 
+        # Keep the statement figures for balance reconciliation
+        opening_balance, closing_balance = to_cents(
+            pd.Series([header["opening_balance"], header["closing_balance"]])
+        )
+        statement = {
+            "source": source_name(file_path),
+            "start": pd.to_datetime(
+                header["start"], format=self.date_format, errors="coerce"
+            ),
+            "end": pd.to_datetime(
+                header["end"], format=self.date_format, errors="coerce"
+            ),
+            "opening_balance": opening_balance,
+            "closing_balance": closing_balance,
+            "transaction_count": pd.to_numeric(
+                header["transaction_count"], errors="coerce"
+            ),
+            "ledger": pd.DataFrame(
+                {
+                    "posting_date": pd.to_datetime(
+                        df["posting_date"], format=self.date_format, errors="coerce"
+                    ),
+                    "amount": signed_amount_cents(df),
+                    "balance": to_cents(df["balance"]),
+                    "transaction_number": df["transaction_number"],
+                }
+            ),
+        }
+
         df["notes"] = df[
             ["description2", "description3", "footnotes", "other_info"]
         ].apply(lambda x: " ".join(filter(None, x.astype(str))), axis=1)
@@ -166,8 +265,14 @@ class UBSCSVTransactionProcessor(BaseProcessor):
         df = df[["transaction_date", "payee", "notes", "debit", "credit"]]
 
         # Get friendly name from config
-        account_name = get_account_name(iban)
+        account_name = get_account_name(iban, config=self.app_config)
         output_prefix = f"ubs_{account_name}"
         logger.debug("Using output prefix: %s", output_prefix)
 
-        return ProcessingResult(data=df, output_prefix=output_prefix)
+        return [
+            ProcessingResult(
+                data=df,
+                output_prefix=output_prefix,
+                metadata={"statement": statement},
+            )
+        ]
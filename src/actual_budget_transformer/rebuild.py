@@ -0,0 +1,192 @@
+"""
+External merge sort used to rebuild the whole output history.
+
+Each processing result is spilled to a temporary run file, sorted by date and
+tagged with its run number, and the balance ledger of each statement to a
+ledger run. The runs of each account are then merged into one sorted stream and
+deduplicated, and the streams of all accounts are merged by date. Transfers are
+matched and balances reconciled on those streams, and monthly files are written
+in a single sequential pass.
+
+Memory holds one row per run, the rows of a single day of an account, the rows
+of one transfer date window and a few entries per input file, whatever the size
+of the history.
+"""
+
+import csv
+import heapq
+import itertools
+import os
+import tempfile
+from collections import Counter, defaultdict, deque
+from operator import itemgetter
+from typing import Callable, Iterable, Iterator, List, Optional, Sequence, Tuple
+import pandas as pd
+from actual_budget_transformer.transfers import TransferMatcher
+
+# Column appended to every run row, after the data columns
+RUN_COLUMN = "_run"
+
+# Columns of ledger runs
+LEDGER_COLUMNS = ["posting_date", "amount", "balance", "transaction_number"]
+
+# Maximum number of runs merged at once, bounding the number of open files
+MERGE_FAN_IN = 64
+
+
+def spill_run(data: pd.DataFrame, path: str, run_id: int) -> None:
+    """
+    Write a processing result to a run file, sorted by transaction date.
+
+    Rows keep the run id, so that copies of a transaction coming from
+    overlapping runs can be told apart while merging. Run files have no header.
+    """
+    run = data.assign(**{RUN_COLUMN: run_id})
+    run.sort_values("transaction_date", kind="stable").to_csv(
+        path, index=False, header=False
+    )
+
+
+def spill_ledger(ledger: pd.DataFrame, path: str) -> None:
+    """
+    Write a chronological statement ledger to a run file.
+
+    Posting dates are written as ISO dates, and missing ones left empty.
+    """
+    ledger[LEDGER_COLUMNS].assign(
+        posting_date=ledger["posting_date"].dt.strftime("%Y-%m-%d")
+    ).to_csv(path, index=False, header=False)
+
+
+def _read_run(path: str) -> Iterator[List[str]]:
+    with open(path, newline="", encoding="utf-8") as f:
+        yield from csv.reader(f)
+
+
+def merge_runs(
+    paths: Sequence[str],
+    sort_column: int,
+    work_dir: str,
+    key: Optional[Callable] = None,
+) -> Iterator[List[str]]:
+    """
+    Merge sorted run files into one sorted stream of rows.
+
+    Runs beyond `MERGE_FAN_IN` are first merged into intermediate runs. The
+    merge is stable: rows with the same key come out in run order.
+
+    Args:
+        paths: Run files, each sorted on `sort_column`
+        sort_column: Index of the column to merge on
+        work_dir: Directory for intermediate runs
+        key: Sort key of a row, overriding `sort_column`
+    """
+    key = key or itemgetter(sort_column)
+    paths = list(paths)
+    while len(paths) > MERGE_FAN_IN:
+        merged_paths = []
+        for start in range(0, len(paths), MERGE_FAN_IN):
+            group = paths[start : start + MERGE_FAN_IN]
+            fd, merged_path = tempfile.mkstemp(suffix=".csv", dir=work_dir)
+            with os.fdopen(fd, "w", newline="", encoding="utf-8") as f:
+                csv.writer(f, lineterminator=os.linesep).writerows(
+                    heapq.merge(*(_read_run(path) for path in group), key=key)
+                )
+            merged_paths.append(merged_path)
+        paths = merged_paths
+    return heapq.merge(*(_read_run(path) for path in paths), key=key)
+
+
+def deduplicate(
+    rows: Iterable[List[str]],
+    date_column: int,
+    key_columns: Sequence[int],
+    run_column: int,
+) -> Iterator[List[str]]:
+    """
+    Drop copies of the same transaction coming from overlapping runs.
+
+    Rows must be sorted by date. A transaction is kept as many times as it
+    appears in the run holding the most copies of it, so identical purchases
+    made on the same day survive while overlapping exports collapse.
+    """
+    for _, group in itertools.groupby(rows, key=itemgetter(date_column)):
+        day = list(group)
+
+        copies = defaultdict(Counter)
+        for row in day:
+            copies[tuple(row[i] for i in key_columns)][row[run_column]] += 1
+
+        emitted = Counter()
+        for row in day:
+            transaction = tuple(row[i] for i in key_columns)
+            if emitted[transaction] < max(copies[transaction].values()):
+                emitted[transaction] += 1
+                yield row
+
+
+def iter_ledger(
+    paths: Sequence[str], work_dir: str
+) -> Iterator[Tuple[pd.Timestamp, int, Optional[int], Optional[str]]]:
+    """
+    Merge ledger runs into the chronological history of an account.
+
+    Runs must be given in statement order. Rows repeated by overlapping
+    statements share their posting date and transaction number, and only the
+    first one is kept. Rows without a posting date come last.
+
+    Yields:
+        (posting date, amount, balance, transaction number) tuples, with the
+        amount and balance in cents and missing values as None.
+    """
+    rows = merge_runs(paths, 0, work_dir, key=lambda row: (row[0] == "", row[0]))
+    for posting_date, day in itertools.groupby(rows, key=itemgetter(0)):
+        date = pd.Timestamp(posting_date) if posting_date else pd.NaT
+        seen = set()
+        for _, amount, balance, transaction_number in day:
+            if transaction_number:
+                if transaction_number in seen:
+                    continue
+                seen.add(transaction_number)
+            yield (
+                date,
+                int(amount),
+                int(balance) if balance else None,
+                transaction_number or None,
+            )
+
+
+def tag_transfers(
+    rows: Iterable[Tuple[pd.Timestamp, str, List[str], int]], window_days: int
+) -> Iterator[Tuple[str, List[str], str]]:
+    """
+    Match transfers on a date sorted stream of transactions of all accounts.
+
+    Rows are held back until no later row can match them, so only the rows of
+    one date window are in memory.
+
+    Args:
+        rows: (date, account, row, signed amount in cents) tuples, sorted by date
+        window_days: Maximum number of days between both sides of a transfer
+
+    Yields:
+        (account, row, counterpart account) tuples in input order, with an
+        empty counterpart for rows that are not transfers.
+    """
+    matcher = TransferMatcher(window_days)
+    held: deque = deque()
+    for date, account, row, amount in rows:
+        while held and date - held[0][0] > matcher.window:
+            _, held_account, held_row, counterpart = held.popleft()
+            yield held_account, held_row, counterpart
+
+        entry = [date, account, row, ""]
+        match = matcher.add(entry, account, date, amount)
+        if match is not None:
+            other, other_account = match
+            other[3] = account
+            entry[3] = other_account
+        held.append(entry)
+
+    for _, held_account, held_row, counterpart in held:
+        yield held_account, held_row, counterpart
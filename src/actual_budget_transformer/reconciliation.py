@@ -0,0 +1,449 @@
+"""
+Reconciliation of account statements against their running balance.
+
+UBS account exports give the balance after each transaction, along with the
+opening and closing balances and the number of transactions of the period.
+Processors keep those figures in the `statement` entry of the result metadata.
+
+Balance continuity is checked with a cumulative sum: on a consistent ledger,
+the balance minus the running total of amounts is the opening balance on every
+row. Each change of that value is a break point, where rows are missing or
+doubled between two consecutive balances. The check runs on each file, then on
+the whole history of each account, with overlapping files deduplicated by
+transaction number.
+
+The last balance of each account is kept between runs, so that the first
+transaction of a new batch is checked against the history already ingested.
+"""
+
+import json
+import logging
+import os
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+import pandas as pd
+from actual_budget_transformer.processors.base_processor import ProcessingResult
+
+# Source name of breaks found across all files of an account
+HISTORY_SOURCE = "history"
+
+# Source name of breaks found against the balance of previous runs
+PREVIOUS_SOURCE = "previous runs"
+
+# File keeping the last balance of each account in the output directory
+BALANCES_FILE = ".balances.json"
+
+
+def _format_cents(cents: int) -> str:
+    return f"{cents / 100:.2f}"
+
+
+@dataclass
+class BalanceBreak:
+    """
+    A row whose balance does not follow from the previous rows.
+
+    Attributes
+    ----------
+    account : str
+        Output prefix of the account
+    source : str
+        File the break was found in, or "history" across all files of the account
+    posting_date : pd.Timestamp
+        Posting date of the first row after the break
+    transaction_number : str, optional
+        Transaction number of the first row after the break
+    expected_balance : int
+        Balance in cents implied by the previous rows
+    actual_balance : int
+        Balance in cents reported by the bank
+    """
+
+    account: str
+    source: str
+    posting_date: pd.Timestamp
+    transaction_number: Optional[str]
+    expected_balance: int
+    actual_balance: int
+
+    @property
+    def difference(self) -> int:
+        """Amount in cents missing (positive) or doubled (negative) before the row."""
+        return self.actual_balance - self.expected_balance
+
+
+@dataclass
+class AccountBalance:
+    """
+    Last known balance of an account.
+
+    Attributes
+    ----------
+    posting_date : pd.Timestamp
+        Posting date of the last transaction
+    transaction_number : str, optional
+        Transaction number of the last transaction
+    balance : int
+        Balance in cents after the last transaction
+    """
+
+    posting_date: pd.Timestamp
+    transaction_number: Optional[str]
+    balance: int
+
+
+def read_balances(path: str) -> Dict[str, AccountBalance]:
+    """Read the last balance of each account, or nothing if the file does not exist."""
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        entries = json.load(f)
+    return {
+        account: AccountBalance(
+            posting_date=pd.Timestamp(entry["posting_date"]),
+            transaction_number=entry["transaction_number"],
+            balance=entry["balance"],
+        )
+        for account, entry in entries.items()
+    }
+
+
+def write_balances(path: str, balances: Dict[str, AccountBalance]) -> None:
+    """Write the last balance of each account."""
+    entries = {
+        account: {
+            "posting_date": balance.posting_date.strftime("%Y-%m-%d"),
+            "transaction_number": balance.transaction_number,
+            "balance": balance.balance,
+        }
+        for account, balance in sorted(balances.items())
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(entries, f, indent=2)
+
+
+@dataclass
+class ReconciliationReport:
+    """
+    Outcome of the balance reconciliation.
+
+    Attributes
+    ----------
+    accounts : list
+        Accounts that were checked
+    breaks : list
+        Break points in the running balance
+    issues : list
+        Statement level inconsistencies, such as a wrong closing balance
+    balances : dict
+        Last known balance of each account, including previous runs
+    """
+
+    accounts: List[str] = field(default_factory=list)
+    breaks: List[BalanceBreak] = field(default_factory=list)
+    issues: List[str] = field(default_factory=list)
+    balances: Dict[str, AccountBalance] = field(default_factory=dict)
+
+    @property
+    def ok(self) -> bool:
+        """True if no inconsistency was found."""
+        return not self.breaks and not self.issues
+
+    def add_history_breaks(self, account: str, breaks: List[BalanceBreak]) -> None:
+        """Add breaks found across files, skipping those already reported."""
+        # Breaks inside a single file also show in the history, report them once
+        known = {
+            (balance_break.posting_date, balance_break.transaction_number)
+            for balance_break in self.breaks
+            if balance_break.account == account
+        }
+        for balance_break in breaks:
+            key = (balance_break.posting_date, balance_break.transaction_number)
+            if key not in known:
+                known.add(key)
+                self.breaks.append(balance_break)
+
+    def log(self, logger: logging.Logger) -> None:
+        """Log a human readable summary."""
+        if not self.accounts:
+            return
+        if self.ok:
+            logger.info("\nBalances reconciled for %d accounts", len(self.accounts))
+            return
+
+        logger.warning("\nBalance reconciliation found inconsistencies:")
+        for issue in self.issues:
+            logger.warning("  - %s", issue)
+        for balance_break in self.breaks:
+            logger.warning(
+                "  - %s, %s: balance %s on %s (transaction %s), expected %s (difference %s)",
+                balance_break.account,
+                balance_break.source,
+                _format_cents(balance_break.actual_balance),
+                balance_break.posting_date.date(),
+                balance_break.transaction_number,
+                _format_cents(balance_break.expected_balance),
+                _format_cents(balance_break.difference),
+            )
+
+
+def find_balance_breaks(
+    ledger: pd.DataFrame, opening_balance, account: str, source: str
+) -> List[BalanceBreak]:
+    """
+    Find break points in a chronological ledger.
+
+    Args:
+        ledger: DataFrame with `posting_date`, `amount` and `balance` (both in
+            cents, balance possibly missing) and `transaction_number` columns
+        opening_balance: Balance in cents before the first row, or <NA> if unknown
+        account: Account name reported in the breaks
+        source: Source name reported in the breaks
+
+    Returns:
+        The break points, in ledger order.
+    """
+    has_balance = ledger["balance"].notna()
+    if not has_balance.any():
+        return []
+
+    running_total = ledger["amount"].cumsum()[has_balance]
+    balances = ledger.loc[has_balance, "balance"].astype("int64")
+    implied_opening = balances - running_total
+
+    first = implied_opening.iloc[0] if pd.isna(opening_balance) else opening_balance
+    previous = implied_opening.shift(1, fill_value=int(first))
+    changed = implied_opening != previous
+
+    transaction_numbers = ledger["transaction_number"].astype(object)
+    transaction_numbers = transaction_numbers.where(transaction_numbers.notna(), None)
+
+    return [
+        BalanceBreak(
+            account=account,
+            source=source,
+            posting_date=ledger.at[index, "posting_date"],
+            transaction_number=transaction_numbers[index],
+            expected_balance=int(
+                balances[index] - implied_opening[index] + previous[index]
+            ),
+            actual_balance=int(balances[index]),
+        )
+        for index in changed[changed].index
+    ]
+
+
+def _chronological(ledger: pd.DataFrame, opening_balance) -> pd.DataFrame:
+    """
+    Return the ledger in chronological order.
+
+    Exports may list rows newest first. Rows sharing a posting date keep the
+    file order, in whichever direction yields the fewest breaks.
+    """
+    orders = [
+        ledger.reset_index(drop=True),
+        ledger.iloc[::-1].reset_index(drop=True),
+    ]
+    orders = [
+        order.sort_values("posting_date", kind="stable").reset_index(drop=True)
+        for order in orders
+    ]
+    return min(
+        orders,
+        key=lambda order: len(find_balance_breaks(order, opening_balance, "", "")),
+    )
+
+
+def _statement_issues(account: str, statement: Dict, ledger: pd.DataFrame) -> List[str]:
+    """Check the statement totals against its rows."""
+    issues = []
+    source = statement["source"]
+
+    expected_count = statement.get("transaction_count")
+    booked_count = int((ledger["amount"] != 0).sum())
+    if not pd.isna(expected_count) and expected_count not in (
+        booked_count,
+        len(ledger),
+    ):
+        issues.append(
+            f"{account}, {source}: {booked_count} transactions, "
+            f"header announces {int(expected_count)}"
+        )
+
+    opening, closing = statement["opening_balance"], statement["closing_balance"]
+    if not pd.isna(opening) and not pd.isna(closing):
+        computed = int(opening + ledger["amount"].sum())
+        if computed != closing:
+            issues.append(
+                f"{account}, {source}: opening balance plus transactions is "
+                f"{_format_cents(computed)}, closing balance is {_format_cents(closing)}"
+            )
+    return issues
+
+
+def check_statement(
+    account: str, statement: Dict
+) -> Tuple[pd.DataFrame, List[str], List[BalanceBreak]]:
+    """
+    Check a statement against its own rows.
+
+    Returns:
+        The chronological ledger of the statement, the statement level issues
+        and the break points of its running balance.
+    """
+    ledger = _chronological(statement["ledger"], statement["opening_balance"])
+    issues = _statement_issues(account, statement, ledger)
+    breaks = find_balance_breaks(
+        ledger, statement["opening_balance"], account, statement["source"]
+    )
+    return ledger, issues, breaks
+
+
+class RunningBalance:
+    """
+    Check the running balance of a chronological ledger fed one row at a time.
+
+    Finds the same break points as `find_balance_breaks`, keeping only the
+    expected balance in memory.
+
+    Args:
+        opening_balance: Balance in cents before the first row, or <NA> if unknown
+        account: Account name reported in the breaks
+        source: Source name reported in the breaks
+    """
+
+    def __init__(self, opening_balance, account: str, source: str):
+        self.account = account
+        self.source = source
+        self.breaks: List[BalanceBreak] = []
+        self.last: Optional[AccountBalance] = None
+        self._expected = None if pd.isna(opening_balance) else int(opening_balance)
+
+    def add(
+        self,
+        posting_date: pd.Timestamp,
+        amount: int,
+        balance: Optional[int],
+        transaction_number: Optional[str],
+    ) -> None:
+        """Add the next row of the ledger."""
+        if self._expected is not None:
+            self._expected += amount
+        if balance is None:
+            return
+        if self._expected is not None and balance != self._expected:
+            self.breaks.append(
+                BalanceBreak(
+                    account=self.account,
+                    source=self.source,
+                    posting_date=posting_date,
+                    transaction_number=transaction_number,
+                    expected_balance=self._expected,
+                    actual_balance=balance,
+                )
+            )
+        self._expected = balance
+        self.last = AccountBalance(posting_date, transaction_number, balance)
+
+
+def _last_balance(history: pd.DataFrame) -> Optional[AccountBalance]:
+    """Return the balance after the last row of a chronological ledger."""
+    with_balance = history[history["balance"].notna()]
+    if with_balance.empty:
+        return None
+    last = with_balance.iloc[-1]
+    return AccountBalance(
+        posting_date=last["posting_date"],
+        transaction_number=(
+            None
+            if pd.isna(last["transaction_number"])
+            else str(last["transaction_number"])
+        ),
+        balance=int(last["balance"]),
+    )
+
+
+def _after(history: pd.DataFrame, previous: AccountBalance) -> pd.DataFrame:
+    """Return the rows of a chronological ledger following a previous balance."""
+    if previous.transaction_number is not None:
+        found = history.index[
+            history["transaction_number"].astype(str) == previous.transaction_number
+        ]
+        if len(found):
+            return history.loc[found[-1] + 1 :]
+    return history[history["posting_date"] > previous.posting_date]
+
+
+def reconcile(
+    results: List[ProcessingResult],
+    previous_balances: Optional[Dict[str, AccountBalance]] = None,
+) -> ReconciliationReport:
+    """
+    Check balance continuity of every statement, then of each account's history.
+
+    Results without statement metadata are ignored.
+
+    Args:
+        results: Processing results to check
+        previous_balances: Last balance of each account from previous runs. The
+            first row following it is checked against it.
+
+    Returns:
+        The report, whose `balances` include the previous balances.
+    """
+    statements_by_account = defaultdict(list)
+    for result in results:
+        statement = result.metadata.get("statement")
+        if statement is not None:
+            statements_by_account[result.output_prefix].append(statement)
+
+    report = ReconciliationReport(balances=dict(previous_balances or {}))
+    for account, statements in statements_by_account.items():
+        report.accounts.append(account)
+        statements.sort(key=lambda statement: statement["start"])
+
+        ledgers = []
+        for statement in statements:
+            ledger, issues, breaks = check_statement(account, statement)
+            report.issues.extend(issues)
+            report.breaks.extend(breaks)
+            ledgers.append(ledger)
+
+        # Overlapping exports repeat rows, which share their transaction number
+        history = pd.concat(ledgers, ignore_index=True)
+        repeated = history["transaction_number"].notna() & history.duplicated(
+            "transaction_number"
+        )
+        history = (
+            history[~repeated]
+            .sort_values("posting_date", kind="stable")
+            .reset_index(drop=True)
+        )
+
+        breaks = []
+        if len(ledgers) > 1:
+            breaks.extend(
+                find_balance_breaks(
+                    history, statements[0]["opening_balance"], account, HISTORY_SOURCE
+                )
+            )
+        previous = report.balances.get(account)
+        if previous is not None:
+            # Only the first row following the previous balance is new here
+            later = _after(history, previous).reset_index(drop=True)
+            breaks.extend(
+                find_balance_breaks(
+                    later.iloc[:1], previous.balance, account, PREVIOUS_SOURCE
+                )
+            )
+
+        report.add_history_breaks(account, breaks)
+
+        last = _last_balance(history)
+        if last is not None and (
+            previous is None or last.posting_date >= previous.posting_date
+        ):
+            report.balances[account] = last
+
+    return report
@@ -0,0 +1,206 @@
+"""
+Matching of transfers between accounts.
+
+Money moved between two accounts shows up in both of them, with opposite
+amounts. The same goes for a card bill paid from an account, which appears as
+a debit on the account and as a credit on the card. This stage runs once all
+files are parsed and pairs those transactions, so they can be tagged as
+transfers in the output.
+
+Transactions are paired in a single pass in date order, each one with the
+closest opposite transaction of another account within the date window.
+Pending transactions are kept per amount, sign and account, so finding a
+counterpart only looks at the latest pending transaction of each other account,
+and transactions leave the window in the order they arrived. The cost stays
+linear in the number of transactions, even when many share the same amount, and
+memory only holds the transactions of one date window.
+"""
+
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+import pandas as pd
+from actual_budget_transformer.amounts import signed_amount_cents
+from actual_budget_transformer.processors.base_processor import ProcessingResult
+
+# Output column holding the counterpart account of a transfer
+TRANSFER_COLUMN = "transfer_account"
+
+# Columns identifying a transaction within an account, across overlapping files
+_KEY_COLUMNS = ["account", "date", "amount", "occurrence"]
+
+
+@dataclass
+class _PendingTransaction:
+    key: Any
+    date: pd.Timestamp
+    sequence: int
+    matched: bool = False
+
+
+class TransferMatcher:
+    """
+    Pair opposite amounts between different accounts, on transactions added in
+    date order.
+
+    Args:
+        window_days: Maximum number of days between both sides of a transfer
+    """
+
+    def __init__(self, window_days: int):
+        self.window = pd.Timedelta(days=window_days)
+        # (magnitude, is credit) -> account -> pending transactions, oldest first
+        self._pending: Dict[Tuple[int, bool], Dict[str, deque]] = {}
+        # Pending transactions in arrival order, to expire them
+        self._arrivals: deque = deque()
+        self._sequence = 0
+
+    def add(
+        self, key: Any, account: str, date: pd.Timestamp, amount: int
+    ) -> Optional[Tuple[Any, str]]:
+        """
+        Add a transaction, pairing it with the latest pending opposite one.
+
+        Args:
+            key: Identifier of the transaction, returned when it is matched later
+            account: Account of the transaction
+            date: Date of the transaction, not before previously added ones
+            amount: Signed amount in cents
+
+        Returns:
+            Key and account of the counterpart transaction, or None if the
+            transaction stays pending.
+        """
+        self._expire(date)
+        if amount == 0:
+            return None
+
+        magnitude, credit = abs(amount), amount > 0
+        opposite = self._pending.get((magnitude, not credit), {})
+        match_account = None
+        for other_account, transactions in opposite.items():
+            if other_account != account and (
+                match_account is None
+                or transactions[-1].sequence > opposite[match_account][-1].sequence
+            ):
+                match_account = other_account
+
+        if match_account is not None:
+            match = opposite[match_account].pop()
+            match.matched = True
+            self._discard_empty((magnitude, not credit), match_account)
+            return match.key, match_account
+
+        pending = _PendingTransaction(key, date, self._sequence)
+        self._sequence += 1
+        bucket = (magnitude, credit)
+        self._pending.setdefault(bucket, {}).setdefault(account, deque()).append(
+            pending
+        )
+        self._arrivals.append((pending, bucket, account))
+        return None
+
+    def _expire(self, date: pd.Timestamp) -> None:
+        """Drop pending transactions too old to be matched from `date` on."""
+        while self._arrivals and date - self._arrivals[0][0].date > self.window:
+            pending, bucket, account = self._arrivals.popleft()
+            if pending.matched:
+                continue
+            # Older transactions of the same account expired or were matched first
+            self._pending[bucket][account].popleft()
+            self._discard_empty(bucket, account)
+
+    def _discard_empty(self, bucket: Tuple[int, bool], account: str) -> None:
+        accounts = self._pending[bucket]
+        if not accounts[account]:
+            del accounts[account]
+            if not accounts:
+                del self._pending[bucket]
+
+
+def find_transfers(keys: pd.DataFrame, window_days: int) -> pd.Series:
+    """
+    Pair opposite amounts between different accounts.
+
+    Args:
+        keys: DataFrame with `account`, `date` and `amount` (signed, in cents) columns
+        window_days: Maximum number of days between both sides of a transfer
+
+    Returns:
+        Series aligned with `keys`, holding the counterpart account of matched
+        transactions and NaN elsewhere.
+    """
+    candidates = keys.loc[keys["amount"] != 0, ["account", "date", "amount"]]
+
+    # Only amounts seen both as a credit and as a debit can be transfers
+    both_signs = (candidates["amount"] > 0).groupby(
+        candidates["amount"].abs()
+    ).transform("nunique") == 2
+    candidates = candidates[both_signs].sort_values("date", kind="stable")
+
+    matcher = TransferMatcher(window_days)
+    counterparts: Dict = {}
+    for row in candidates.itertuples():
+        match = matcher.add(row.Index, row.account, row.date, row.amount)
+        if match is not None:
+            match_index, match_account = match
+            counterparts[row.Index] = match_account
+            counterparts[match_index] = row.account
+
+    return pd.Series(counterparts, dtype=object).reindex(keys.index)
+
+
+def match_transfers(
+    results: List[ProcessingResult], window_days: int
+) -> List[ProcessingResult]:
+    """
+    Tag transfers between the accounts of several processing results.
+
+    Each result's output prefix identifies its account. The same transaction
+    found in overlapping files of one account is matched once, and tagged in
+    every file it appears in.
+
+    Args:
+        results: Processing results of all parsed files
+        window_days: Maximum number of days between both sides of a transfer
+
+    Returns:
+        The results, with a `transfer_account` column added to their data.
+    """
+    if not results:
+        return results
+
+    keys = pd.concat(
+        [
+            pd.DataFrame(
+                {
+                    "account": result.output_prefix,
+                    "date": pd.to_datetime(result.data["transaction_date"]),
+                    "amount": signed_amount_cents(result.data),
+                    "result": index,
+                }
+            )
+            for index, result in enumerate(results)
+        ],
+        ignore_index=True,
+    )
+    # Rank identical transactions within each file, so that repeated purchases
+    # stay distinct while copies from overlapping files collapse together
+    keys["occurrence"] = keys.groupby(
+        ["result", "account", "date", "amount"]
+    ).cumcount()
+
+    unique_keys = keys.drop_duplicates(_KEY_COLUMNS).reset_index(drop=True)
+    unique_keys[TRANSFER_COLUMN] = find_transfers(unique_keys, window_days)
+    counterparts = keys.merge(
+        unique_keys[_KEY_COLUMNS + [TRANSFER_COLUMN]], how="left"
+    )[TRANSFER_COLUMN].fillna("")
+
+    start = 0
+    for result in results:
+        end = start + len(result.data)
+        result.data = result.data.assign(
+            **{TRANSFER_COLUMN: counterparts.iloc[start:end].to_numpy()}
+        )
+        start = end
+    return results
@@ -0,0 +1,746 @@
+"""
+In-process API of the transformer.
+
+A `Transformer` bundles a configuration and never reads or writes module level
+state, so several instances with different configurations can run side by side
+in the same process, including from different threads.
+
+Usage:
+    from actual_budget_transformer import Transformer
+
+    transformer = Transformer.from_file("config.yaml")
+    results = transformer.process(uploaded_bytes, name="export.csv")
+    summary = transformer.run(["exports/"], output_dir="output")
+"""
+
+import csv
+import heapq
+import logging
+import os
+import tempfile
+from collections import defaultdict
+from operator import itemgetter
+from dataclasses import dataclass, field
+from typing import IO, Dict, Iterable, Iterator, List, Optional, Tuple
+import pandas as pd
+from actual_budget_transformer.amounts import signed_cents
+from actual_budget_transformer.config import read_config
+from actual_budget_transformer.factory import PROCESSORS, ProcessorRegistry
+from actual_budget_transformer.logging_config import logger as package_logger
+from actual_budget_transformer.payee_rules import ORIGINAL_PAYEE_COLUMN, PayeeRules
+from actual_budget_transformer.rebuild import (
+    deduplicate,
+    iter_ledger,
+    merge_runs,
+    spill_ledger,
+    spill_run,
+    tag_transfers,
+)
+from actual_budget_transformer.reconciliation import (
+    BALANCES_FILE,
+    HISTORY_SOURCE,
+    ReconciliationReport,
+    RunningBalance,
+    check_statement,
+    read_balances,
+    reconcile,
+    write_balances,
+)
+from actual_budget_transformer.transfers import TRANSFER_COLUMN, match_transfers
+from actual_budget_transformer.processors.base_processor import (
+    BaseProcessor,
+    FileSource,
+    InMemoryFile,
+    ProcessingResult,
+)
+
+# Anything the transformer accepts as input: a path, raw bytes, a binary file
+# object, or a (file name, bytes or binary file object) pair
+Source = FileSource | bytes | IO[bytes] | Tuple[str, bytes | IO[bytes]]
+
+# Columns identifying a transaction when merging with existing monthly files
+TRANSACTION_KEY_COLUMNS = ["transaction_date", "payee", "notes", "debit", "credit"]
+
+# Columns written by payee rules, refreshed on transactions already saved
+DERIVED_COLUMNS = ["payee", "category", ORIGINAL_PAYEE_COLUMN]
+
+# Rank of identical transactions, so that repeated purchases stay distinct
+_OCCURRENCE_COLUMN = "_occurrence"
+
+
+def transaction_key_columns(columns: List[str]) -> List[str]:
+    """
+    Return the columns identifying a transaction among the given columns.
+
+    Payee rules rewrite the payee, so the payee as found in the input is used
+    when it was kept.
+    """
+    if ORIGINAL_PAYEE_COLUMN not in columns:
+        return TRANSACTION_KEY_COLUMNS
+    return [
+        ORIGINAL_PAYEE_COLUMN if column == "payee" else column
+        for column in TRANSACTION_KEY_COLUMNS
+    ]
+
+
+def _merge_keys(df: pd.DataFrame) -> pd.DataFrame:
+    """Return the key columns of a monthly file, ranking identical transactions."""
+    keys = df[TRANSACTION_KEY_COLUMNS].copy()
+    if ORIGINAL_PAYEE_COLUMN in df:
+        # Files written without payee rules only have the original payee
+        original = df[ORIGINAL_PAYEE_COLUMN]
+        keys["payee"] = original.where(original.notna(), df["payee"])
+    keys[_OCCURRENCE_COLUMN] = keys.groupby(
+        TRANSACTION_KEY_COLUMNS, dropna=False
+    ).cumcount()
+    return keys
+
+
+def as_file_source(source: Source, name: Optional[str] = None) -> FileSource:
+    """
+    Convert any supported input into something processors can read.
+
+    Args:
+        source: Path, raw bytes, binary file object, `InMemoryFile`, or a
+            (file name, bytes or binary file object) pair.
+        name: File name for in-memory content. Processors use it for extension
+            checks, so pass it along with bytes and anonymous streams.
+
+    Returns:
+        A path or an `InMemoryFile`.
+
+    Raises:
+        TypeError: If the source type is not supported.
+    """
+    if isinstance(source, (InMemoryFile, str, os.PathLike)):
+        return source
+    if isinstance(source, tuple) and len(source) == 2:
+        source_name, content = source
+        return as_file_source(content, name or source_name)
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return InMemoryFile(name or "<bytes>", bytes(source))
+    if hasattr(source, "read"):
+        content = source.read()
+        if not isinstance(content, bytes):
+            raise TypeError("File objects must be opened in binary mode")
+        stream_name = os.path.basename(str(getattr(source, "name", "<stream>")))
+        return InMemoryFile(name or stream_name, content)
+    raise TypeError(f"Unsupported source type: {type(source).__name__}")
+
+
+@dataclass
+class SaveSummary:
+    """
+    Outcome of saving one processing result to monthly files.
+
+    Attributes
+    ----------
+    output_prefix : str
+        Prefix of the monthly files that were written
+    files_created : list
+        Names of the monthly files created
+    files_updated : list
+        Names of the existing monthly files new transactions were added to
+    transactions_by_month : dict
+        Total number of transactions per month after saving
+    new_transactions_by_month : dict
+        Number of transactions added per month
+    """
+
+    output_prefix: str
+    files_created: List[str] = field(default_factory=list)
+    files_updated: List[str] = field(default_factory=list)
+    transactions_by_month: Dict[str, int] = field(default_factory=dict)
+    new_transactions_by_month: Dict[str, int] = field(default_factory=dict)
+
+    def log(self, logger: logging.Logger) -> None:
+        """Log a human readable summary."""
+        logger.info("\nProcessing summary:")
+        if self.files_created:
+            logger.info("New files created: %d", len(self.files_created))
+            for filename in sorted(self.files_created):
+                logger.info("  - %s", filename)
+
+        if self.files_updated:
+            logger.info("\nExisting files updated: %d", len(self.files_updated))
+            for filename in sorted(self.files_updated):
+                logger.info("  - %s", filename)
+
+        logger.info("\nTransactions by month:")
+        for yearmonth in sorted(self.transactions_by_month.keys()):
+            total = self.transactions_by_month[yearmonth]
+            new = self.new_transactions_by_month[yearmonth]
+            if new > 0:
+                logger.info("  %s: %d transactions (%d new)", yearmonth, total, new)
+            else:
+                logger.info("  %s: %d transactions (no changes)", yearmonth, total)
+
+        logger.info(
+            "\nTotal transactions across all files: %d",
+            sum(self.transactions_by_month.values()),
+        )
+        logger.info(
+            "Total new transactions added: %d",
+            sum(self.new_transactions_by_month.values()),
+        )
+
+
+@dataclass
+class RunSummary:
+    """
+    Outcome of a batch run.
+
+    Attributes
+    ----------
+    results : list
+        Processing results, in input order
+    files_processed : int
+        Number of inputs that were processed
+    saved : list
+        One SaveSummary per saved result, empty when no output directory was given
+    files_skipped : list
+        (file name, reason) pairs for inputs no processor could handle
+    reconciliation : ReconciliationReport
+        Balance continuity check of the processed statements
+    """
+
+    results: List[ProcessingResult] = field(default_factory=list)
+    files_processed: int = 0
+    saved: List[SaveSummary] = field(default_factory=list)
+    files_skipped: List[Tuple[str, str]] = field(default_factory=list)
+    reconciliation: ReconciliationReport = field(default_factory=ReconciliationReport)
+
+
+class _MonthlyFiles:
+    """
+    Write the date sorted rows of an account to monthly files, opening each
+    file once.
+    """
+
+    def __init__(
+        self,
+        output_dir: str,
+        output_prefix: str,
+        header: List[str],
+        date_column: int,
+        date_format: str,
+    ):
+        self.output_dir = output_dir
+        self.header = header
+        self.date_column = date_column
+        self.date_format = date_format
+        self.summary = SaveSummary(output_prefix=output_prefix)
+        self._months: Dict[str, str] = {}
+        self._current_month = None
+        self._file = None
+        self._writer = None
+
+    def write(self, values: List[str]) -> None:
+        """Write a row to the file of its month."""
+        date = values[self.date_column]
+        if date not in self._months:
+            self._months[date] = pd.Timestamp(date).strftime(self.date_format)
+        yearmonth = self._months[date]
+
+        if yearmonth != self._current_month:
+            self.close()
+            output_filename = f"{yearmonth}_{self.summary.output_prefix}.csv"
+            first_write = yearmonth not in self.summary.transactions_by_month
+            self._file = open(
+                os.path.join(self.output_dir, output_filename),
+                "w" if first_write else "a",
+                newline="",
+                encoding="utf-8",
+            )
+            self._writer = csv.writer(self._file, lineterminator=os.linesep)
+            if first_write:
+                self._writer.writerow(self.header)
+                self.summary.files_created.append(output_filename)
+                self.summary.transactions_by_month[yearmonth] = 0
+                self.summary.new_transactions_by_month[yearmonth] = 0
+            self._current_month = yearmonth
+
+        self._writer.writerow(values)
+        self.summary.transactions_by_month[yearmonth] += 1
+        self.summary.new_transactions_by_month[yearmonth] += 1
+
+    def close(self) -> None:
+        """Close the file of the current month."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            self._current_month = None
+
+
+class Transformer:
+    """
+    Transform bank exports into Actual Budget CSV files, in process.
+
+    Args:
+        config: Configuration dictionary, as read by `read_config`.
+        logger: Logger for progress messages. Defaults to the package logger.
+
+    Raises:
+        ValueError: If the payee rules in the configuration are invalid.
+    """
+
+    def __init__(self, config: Dict, logger: Optional[logging.Logger] = None):
+        self.config = config
+        self.logger = logger or package_logger
+        self.payee_rules = PayeeRules.from_config(config)
+        self.registry = ProcessorRegistry(PROCESSORS, config)
+
+    @classmethod
+    def from_file(
+        cls, config_path: str, logger: Optional[logging.Logger] = None
+    ) -> "Transformer":
+        """Create a transformer from a YAML configuration file."""
+        return cls(read_config(config_path), logger)
+
+    def get_processor(self, source: FileSource) -> BaseProcessor:
+        """
+        Return a processor able to handle the source.
+
+        Raises:
+            ValueError: If no suitable processor is found.
+        """
+        return self.registry.get_processor(source)
+
+    def process(
+        self, source: Source, name: Optional[str] = None
+    ) -> List[ProcessingResult]:
+        """
+        Process a single input.
+
+        Args:
+            source: Path, raw bytes, binary file object, `InMemoryFile` or
+                (file name, content) pair.
+            name: File name for in-memory content, see `as_file_source`.
+
+        Returns:
+            One ProcessingResult with normalized transactions per account in the input.
+
+        Raises:
+            ValueError: If no processor can handle the input or it cannot be parsed.
+        """
+        file_source = as_file_source(source, name)
+        self.logger.info("Processing %s...", file_source)
+        processor = self.get_processor(file_source)
+        results = processor.process(file_source)
+        for result in results:
+            result.data = self.payee_rules.apply(result.data)
+        return results
+
+    def iter_process(self, sources: Iterable[Source]) -> Iterator[ProcessingResult]:
+        """
+        Process inputs one at a time, yielding each result as soon as it is ready.
+
+        Directories are walked recursively. In-memory content is passed as
+        `InMemoryFile` or (file name, content) pairs, so that processors can
+        check the file name. Inputs no processor can handle are logged and
+        skipped.
+        """
+        yield from self._iter_results(sources, RunSummary())
+
+    def match_transfers(
+        self, results: List[ProcessingResult]
+    ) -> List[ProcessingResult]:
+        """
+        Tag transfers between the accounts of the given results.
+
+        Matching is enabled by the `transfers` section of the configuration.
+        Results are returned unchanged otherwise.
+        """
+        transfers_config = self.config.get("transfers")
+        if transfers_config is None:
+            return results
+        window_days = transfers_config.get("date_window_days", 3)
+        results = match_transfers(results, window_days)
+        self.logger.info(
+            "Matched %d transfer transactions",
+            sum((result.data[TRANSFER_COLUMN] != "").sum() for result in results),
+        )
+        return results
+
+    def reconcile(
+        self, results: List[ProcessingResult], output_dir: Optional[str] = None
+    ) -> ReconciliationReport:
+        """
+        Check the running balance of the given results, per file and per account.
+
+        Only results carrying statement metadata, such as UBS account exports,
+        are checked.
+
+        Args:
+            results: Processing results to check
+            output_dir: Output directory keeping the last balance of each
+                account. When given, new transactions are checked against the
+                balance of previous runs, and the latest balances are saved.
+        """
+        if not output_dir:
+            return reconcile(results)
+        balances_path = os.path.join(output_dir, BALANCES_FILE)
+        report = reconcile(results, read_balances(balances_path))
+        if report.accounts:
+            os.makedirs(output_dir, exist_ok=True)
+            write_balances(balances_path, report.balances)
+        return report
+
+    def save(self, result: ProcessingResult, output_dir: str) -> SaveSummary:
+        """
+        Split transactions by month and save them to separate files.
+        If a monthly file already exists, merge new transactions with it.
+
+        Args:
+            result: Processing result to save
+            output_dir: Directory to save the files
+
+        Returns:
+            SaveSummary describing the files written.
+        """
+        output_prefix = result.output_prefix
+        df = result.data.copy()
+        df["transaction_date"] = pd.to_datetime(df["transaction_date"])
+
+        output_date_format = self.config["output"]["date_format"]
+        os.makedirs(output_dir, exist_ok=True)
+
+        # Group by year and month using configured format
+        grouped = df.groupby(df["transaction_date"].dt.strftime(output_date_format))
+
+        summary = SaveSummary(output_prefix=output_prefix)
+
+        # Process each month's transactions
+        for yearmonth, month_df in grouped:
+            output_filename = f"{yearmonth}_{output_prefix}.csv"
+            output_path = os.path.join(output_dir, output_filename)
+
+            if os.path.exists(output_path):
+                # Read existing file
+                existing_df = pd.read_csv(output_path)
+                existing_df["transaction_date"] = pd.to_datetime(
+                    existing_df["transaction_date"]
+                )
+
+                # Find new transactions by comparing the key columns. Payees
+                # are compared as found in the input, before payee rules.
+                existing_keys = _merge_keys(existing_df).reset_index(names="_existing")
+                matched = (
+                    _merge_keys(month_df)
+                    .merge(
+                        existing_keys,
+                        on=TRANSACTION_KEY_COLUMNS + [_OCCURRENCE_COLUMN],
+                        how="left",
+                    )["_existing"]
+                    .to_numpy()
+                )
+                is_new = pd.isna(matched)
+                new_transactions = month_df[is_new]
+
+                # Transactions already saved take the current payee rules and
+                # the transfers found in this run
+                refreshed = self._refresh_derived_columns(
+                    existing_df,
+                    matched[~is_new].astype(int),
+                    month_df[~is_new],
+                )
+
+                if len(new_transactions) > 0 or refreshed > 0:
+                    # Combine existing and new transactions
+                    combined_df = pd.concat([existing_df, new_transactions])
+
+                    # Sort by date
+                    combined_df = combined_df.sort_values("transaction_date")
+
+                    # Save updated file
+                    combined_df.to_csv(output_path, index=False)
+
+                    summary.files_updated.append(output_filename)
+                    summary.new_transactions_by_month[yearmonth] = len(new_transactions)
+                    summary.transactions_by_month[yearmonth] = len(combined_df)
+
+                    self.logger.info(
+                        "Added %d new and updated %d existing transactions in %s (total: %d)",
+                        len(new_transactions),
+                        refreshed,
+                        output_filename,
+                        len(combined_df),
+                    )
+                else:
+                    summary.transactions_by_month[yearmonth] = len(existing_df)
+                    summary.new_transactions_by_month[yearmonth] = 0
+                    self.logger.info(
+                        "No new transactions to add to %s (existing: %d)",
+                        output_filename,
+                        len(existing_df),
+                    )
+            else:
+                # Create new file
+                month_df = month_df.sort_values("transaction_date")
+                month_df.to_csv(output_path, index=False)
+
+                summary.files_created.append(output_filename)
+                summary.transactions_by_month[yearmonth] = len(month_df)
+                summary.new_transactions_by_month[yearmonth] = len(month_df)
+
+                self.logger.info(
+                    "Created new file %s with %d transactions",
+                    output_filename,
+                    len(month_df),
+                )
+
+        return summary
+
+    @staticmethod
+    def _refresh_derived_columns(
+        existing_df: pd.DataFrame, positions, incoming: pd.DataFrame
+    ) -> int:
+        """
+        Copy derived columns from incoming transactions onto the saved ones.
+
+        Payee rule columns are always copied. Transfer tags are only copied when
+        a counterpart was found, since a run may not include the other account.
+
+        Args:
+            existing_df: Saved transactions, updated in place
+            positions: Row positions in `existing_df` matching the incoming rows
+            incoming: Incoming transactions, in the order of `positions`
+
+        Returns:
+            Number of saved transactions that changed.
+        """
+        changed = pd.Series(False, index=existing_df.index)
+        for column in DERIVED_COLUMNS + [TRANSFER_COLUMN]:
+            if column not in incoming or len(positions) == 0:
+                continue
+            values = incoming[column].to_numpy()
+            # Empty values read back from CSV files as NaN
+            after = incoming[column].fillna("").astype(str).to_numpy()
+            column_positions = positions
+            if column == TRANSFER_COLUMN:
+                tagged = after != ""
+                column_positions, values, after = (
+                    positions[tagged],
+                    values[tagged],
+                    after[tagged],
+                )
+
+            if column not in existing_df:
+                existing_df[column] = ""
+            existing_df[column] = existing_df[column].astype(object)
+            before = (
+                existing_df[column]
+                .iloc[column_positions]
+                .fillna("")
+                .astype(str)
+                .to_numpy()
+            )
+            changed.iloc[column_positions[before != after]] = True
+            existing_df.iloc[column_positions, existing_df.columns.get_loc(column)] = (
+                values
+            )
+        return int(changed.sum())
+
+    def run(
+        self, sources: Iterable[Source], output_dir: Optional[str] = None
+    ) -> RunSummary:
+        """
+        Process a batch of inputs and optionally save them to monthly files.
+
+        All inputs are parsed before transfers are matched, balances are
+        reconciled and anything is saved.
+
+        Args:
+            sources: Paths (files or directories), `InMemoryFile` or
+                (file name, bytes or binary file object) pairs.
+            output_dir: Directory to save monthly files to. Nothing is written when omitted.
+
+        Returns:
+            RunSummary with the results and what was written.
+        """
+        summary = RunSummary()
+        summary.results = self.match_transfers(
+            list(self._iter_results(sources, summary))
+        )
+        summary.reconciliation = self.reconcile(summary.results, output_dir)
+        if output_dir:
+            for result in summary.results:
+                summary.saved.append(self.save(result, output_dir))
+        return summary
+
+    def rebuild(self, sources: Iterable[Source], output_dir: str) -> RunSummary:
+        """
+        Rebuild all monthly files from scratch with an external merge sort.
+
+        Each input is processed once and spilled to a temporary run sorted by
+        date, along with the balance ledger of its statement. The runs of each
+        account are merged with deduplication, and the streams of all accounts
+        are merged by date. Transfers are matched on that stream within the
+        date window, balances are reconciled on the merged ledger runs, and
+        every monthly file is written once, in a single sequential pass.
+        Existing monthly files for the rebuilt months are overwritten.
+
+        Memory does not grow with the number of transactions: it holds one row
+        per run, one day of an account and one transfer date window, plus a few
+        entries per input file. The returned summary has no processing results.
+
+        Args:
+            sources: Paths (files or directories), `InMemoryFile` or
+                (file name, bytes or binary file object) pairs.
+            output_dir: Directory to write monthly files to.
+
+        Returns:
+            RunSummary describing what was written.
+        """
+        summary = RunSummary()
+        report = summary.reconciliation
+        os.makedirs(output_dir, exist_ok=True)
+
+        with tempfile.TemporaryDirectory(prefix="actual-budget-rebuild-") as work_dir:
+            runs_by_account = defaultdict(list)
+            columns_by_account = {}
+            ledgers_by_account = defaultdict(list)
+            for run_id, result in enumerate(self._iter_results(sources, summary)):
+                prefix = result.output_prefix
+                columns = columns_by_account.setdefault(
+                    prefix, list(result.data.columns)
+                )
+                run_path = os.path.join(work_dir, f"run_{run_id}.csv")
+                spill_run(result.data.reindex(columns=columns), run_path, run_id)
+                runs_by_account[prefix].append(run_path)
+
+                # Statements are checked on their own right away, and across
+                # files once all ledgers are spilled
+                statement = result.metadata.get("statement")
+                if statement is not None:
+                    ledger, issues, breaks = check_statement(prefix, statement)
+                    report.issues.extend(issues)
+                    report.breaks.extend(breaks)
+                    ledger_path = os.path.join(work_dir, f"ledger_{run_id}.csv")
+                    spill_ledger(ledger, ledger_path)
+                    ledgers_by_account[prefix].append(
+                        (statement["start"], statement["opening_balance"], ledger_path)
+                    )
+
+            # The history is rebuilt from scratch, previous balances do not apply
+            for account, ledgers in ledgers_by_account.items():
+                report.accounts.append(account)
+                ledgers.sort(key=lambda ledger: ledger[0])
+                running = RunningBalance(ledgers[0][1], account, HISTORY_SOURCE)
+                for row in iter_ledger([path for _, _, path in ledgers], work_dir):
+                    running.add(*row)
+                report.add_history_breaks(account, running.breaks)
+                if running.last is not None:
+                    report.balances[account] = running.last
+            if report.accounts:
+                write_balances(os.path.join(output_dir, BALANCES_FILE), report.balances)
+
+            summary.saved = self._write_monthly_files(
+                runs_by_account, columns_by_account, output_dir, work_dir
+            )
+        return summary
+
+    def _write_monthly_files(
+        self,
+        runs_by_account: Dict[str, List[str]],
+        columns_by_account: Dict[str, List[str]],
+        output_dir: str,
+        work_dir: str,
+    ) -> List[SaveSummary]:
+        """Merge the runs of all accounts by date and write their monthly files."""
+        transfers_config = self.config.get("transfers")
+        output_date_format = self.config["output"]["date_format"]
+
+        def account_rows(prefix: str) -> Iterator[Tuple[str, str, List[str]]]:
+            columns = columns_by_account[prefix]
+            date_column = columns.index("transaction_date")
+            rows = deduplicate(
+                merge_runs(runs_by_account[prefix], date_column, work_dir),
+                date_column,
+                [columns.index(column) for column in transaction_key_columns(columns)],
+                len(columns),
+            )
+            for row in rows:
+                yield row[date_column], prefix, row
+
+        rows = heapq.merge(
+            *(account_rows(prefix) for prefix in runs_by_account), key=itemgetter(0)
+        )
+        if transfers_config is None:
+            tagged = ((prefix, row, None) for _, prefix, row in rows)
+        else:
+            tagged = tag_transfers(
+                self._with_amounts(rows, columns_by_account),
+                transfers_config.get("date_window_days", 3),
+            )
+
+        files = {
+            prefix: _MonthlyFiles(
+                output_dir,
+                prefix,
+                columns + ([TRANSFER_COLUMN] if transfers_config is not None else []),
+                columns.index("transaction_date"),
+                output_date_format,
+            )
+            for prefix, columns in columns_by_account.items()
+        }
+        try:
+            for prefix, row, counterpart in tagged:
+                values = row[: len(columns_by_account[prefix])]
+                if counterpart is not None:
+                    values.append(counterpart)
+                files[prefix].write(values)
+        finally:
+            for monthly_files in files.values():
+                monthly_files.close()
+
+        for monthly_files in files.values():
+            self.logger.info(
+                "Rebuilt %d monthly files for %s",
+                len(monthly_files.summary.files_created),
+                monthly_files.summary.output_prefix,
+            )
+        return [monthly_files.summary for monthly_files in files.values()]
+
+    @staticmethod
+    def _with_amounts(
+        rows: Iterable[Tuple[str, str, List[str]]],
+        columns_by_account: Dict[str, List[str]],
+    ) -> Iterator[Tuple[pd.Timestamp, str, List[str], int]]:
+        """Parse the date and signed amount of date sorted run rows."""
+        amount_columns = {
+            prefix: (columns.index("debit"), columns.index("credit"))
+            for prefix, columns in columns_by_account.items()
+        }
+        previous_date, date = None, None
+        for date_text, prefix, row in rows:
+            if date_text != previous_date:
+                previous_date, date = date_text, pd.Timestamp(date_text)
+            debit_column, credit_column = amount_columns[prefix]
+            yield date, prefix, row, signed_cents(row[debit_column], row[credit_column])
+
+    def _iter_sources(self, sources: Iterable[Source]) -> Iterator[Source]:
+        """Expand directories into the files they contain."""
+        for source in sources:
+            if isinstance(source, (str, os.PathLike)) and os.path.isdir(source):
+                self.logger.info("Processing directory: %s", source)
+                for root, _, files in os.walk(source):
+                    for file in files:
+                        yield os.path.join(root, file)
+            else:
+                yield source
+
+    def _iter_results(
+        self, sources: Iterable[Source], summary: RunSummary
+    ) -> Iterator[ProcessingResult]:
+        """Process inputs, recording skipped ones in the summary."""
+        for source in self._iter_sources(sources):
+            file_source = as_file_source(source)
+            try:
+                results = self.process(file_source)
+            except ValueError as e:
+                self.logger.warning("Skipping %s: %s", file_source, e)
+                summary.files_skipped.append((str(file_source), str(e)))
+                continue
+            summary.files_processed += 1
+            yield from results
@@ -0,0 +1,46 @@
+# pylint: disable=missing-function-docstring,missing-module-docstring
+import os
+import pytest
+from actual_budget_transformer.config import read_config
+from actual_budget_transformer.factory import PROCESSORS, ProcessorRegistry
+from actual_budget_transformer.processors.base_processor import InMemoryFile
+from actual_budget_transformer.processors.ubs_cards_csv_transaction_processor import (
+    UBSCardsCSVTransactionProcessor,
+)
+from actual_budget_transformer.processors.ubs_csv_transaction_processor import (
+    UBSCSVTransactionProcessor,
+)
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
+REGISTRY = ProcessorRegistry(
+    PROCESSORS, read_config(os.path.join(DATA_DIR, "test_config.yml"))
+)
+
+
+def test_candidates_match_signatures():
+    assert REGISTRY.candidates(os.path.join(DATA_DIR, "ubs_valid.csv")) == [
+        UBSCSVTransactionProcessor
+    ]
+    assert REGISTRY.candidates(os.path.join(DATA_DIR, "ubs_cards_valid.csv")) == [
+        UBSCardsCSVTransactionProcessor
+    ]
+
+
+@pytest.mark.parametrize(
+    "file_name",
+    ["ubs_invalid_encoding.csv", "ubs_invalid_extension.txt", "ubs_invalid_header.csv"],
+)
+def test_candidates_reject_unsupported_files(file_name):
+    assert REGISTRY.candidates(os.path.join(DATA_DIR, file_name)) == []
+
+
+def test_get_processor_runs_full_validation():
+    file_path = os.path.join(DATA_DIR, "ubs_invalid_transaction_columns.csv")
+    assert REGISTRY.candidates(file_path) == [UBSCSVTransactionProcessor]
+    with pytest.raises(ValueError):
+        REGISTRY.get_processor(file_path)
+
+
+def test_unconfigured_processors_are_not_registered():
+    registry = ProcessorRegistry(PROCESSORS, {"processors": {}})
+    assert registry.candidates(InMemoryFile("statement.csv", b"sep=;\n")) == []
@@ -0,0 +1,133 @@
+# pylint: disable=missing-function-docstring,missing-module-docstring
+import time
+import pandas as pd
+import pytest
+from actual_budget_transformer.payee_rules import PayeeRules
+
+CONFIG = {
+    "payee_rules": [
+        {"match": "coop", "payee": "Coop", "category": "Groceries"},
+        {"match": "coop pronto", "payee": "Coop Pronto"},
+        {"pattern": r"sbb\s*cff", "payee": "SBB", "category": "Transport"},
+        {"pattern": r"cff", "payee": "Never used"},
+    ]
+}
+
+
+def test_match_literal_prefers_longest():
+    rules = PayeeRules.from_config(CONFIG)
+    assert rules.match("COOP-1234 Bern").payee == "Coop"
+    assert rules.match("Coop Pronto Zurich").payee == "Coop Pronto"
+    assert rules.match("Migros") is None
+
+
+def test_match_pattern_in_listed_order():
+    rules = PayeeRules.from_config(CONFIG)
+    assert rules.match("Billet SBB CFF mobile").payee == "SBB"
+    assert rules.match("Paiement CFF").payee == "Never used"
+
+
+def test_apply_maps_unique_payees_and_adds_category():
+    rules = PayeeRules.from_config(CONFIG)
+    df = pd.DataFrame({"payee": ["COOP 1", "Other", None, "COOP 1", "sbb cff"]})
+
+    result = rules.apply(df)
+
+    assert result["payee"].tolist()[:2] == ["Coop", "Other"]
+    assert pd.isna(result["payee"].iloc[2])
+    assert result["payee"].tolist()[3:] == ["Coop", "SBB"]
+    assert result["category"].tolist() == [
+        "Groceries",
+        "",
+        "",
+        "Groceries",
+        "Transport",
+    ]
+
+
+def test_apply_without_rules_returns_input():
+    df = pd.DataFrame({"payee": ["COOP 1"]})
+    assert PayeeRules.from_config({}).apply(df) is df
+
+
+def test_invalid_rules_are_rejected():
+    with pytest.raises(ValueError):
+        PayeeRules.from_config({"payee_rules": [{"match": "coop"}]})
+    with pytest.raises(ValueError):
+        PayeeRules.from_config({"payee_rules": [{"pattern": "(", "payee": "X"}]})
+
+
+def test_match_literal_with_unicode_case_folding():
+    rules = PayeeRules.from_config(
+        {
+            "payee_rules": [
+                {"match": "istanbul kebab", "payee": "Istanbul Kebab"},
+                {"match": "sbb", "payee": "SBB"},
+            ]
+        }
+    )
+    assert rules.match("İSTANBUL KEBAB").payee == "Istanbul Kebab"
+    assert rules.match("ſbb").payee == "SBB"
+
+
+def test_match_pattern_keeps_its_own_groups():
+    rules = PayeeRules.from_config(
+        {
+            "payee_rules": [
+                {"match": "coop", "payee": "Coop"},
+                {"pattern": r"(twint|paypal) \*", "payee": "Wallet"},
+                {"pattern": r"(?P<shop>amazon)\.(de|ch)", "payee": "Amazon"},
+            ]
+        }
+    )
+    assert rules.match("TWINT *Some shop").payee == "Wallet"
+    assert rules.match("AMAZON.CH order").payee == "Amazon"
+
+
+@pytest.mark.parametrize("pattern", [r"(ab)\1", r"(?P<x>a)(?P=x)", r"(a)(?(1)b)"])
+def test_patterns_referring_to_groups_are_rejected(pattern):
+    with pytest.raises(ValueError):
+        PayeeRules.from_config({"payee_rules": [{"pattern": pattern, "payee": "X"}]})
+
+
+def test_escaped_backslash_is_not_a_group_reference():
+    rules = PayeeRules.from_config(
+        {"payee_rules": [{"pattern": r"a\\1", "payee": "X"}]}
+    )
+    assert rules.match("a\\1").payee == "X"
+
+
+def test_pattern_with_global_flags_is_rejected_by_name():
+    with pytest.raises(ValueError, match=r"\(\?s\)coop"):
+        PayeeRules.from_config(
+            {
+                "payee_rules": [
+                    {"pattern": "migros", "payee": "Migros"},
+                    {"pattern": "(?s)coop", "payee": "Coop"},
+                ]
+            }
+        )
+
+
+def test_many_patterns_stay_cheap():
+    rules = PayeeRules.from_config(
+        {
+            "payee_rules": [
+                {"pattern": rf"shop{i:04d}\s*\d+", "payee": f"Shop {i}"}
+                for i in range(2000)
+            ]
+        }
+    )
+    payees = [f"Card payment SHOP{i:04d} 42 Bern" for i in range(0, 2000, 4)]
+    payees += [f"Unrelated payee number {i}" for i in range(500)]
+
+    start = time.perf_counter()
+    matches = [rules.match(payee) for payee in payees]
+    elapsed = time.perf_counter() - start
+
+    assert [rule.payee for rule in matches[:500]] == [
+        f"Shop {i}" for i in range(0, 2000, 4)
+    ]
+    assert matches[500:] == [None] * 500
+    # A per-pattern group in the combined expression took minutes here
+    assert elapsed < 10
@@ -0,0 +1,192 @@
+# pylint: disable=missing-function-docstring,missing-module-docstring
+import os
+import pandas as pd
+from actual_budget_transformer import Transformer
+from actual_budget_transformer import rebuild
+from actual_budget_transformer.rebuild import (
+    deduplicate,
+    merge_runs,
+    spill_run,
+    tag_transfers,
+)
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
+CONFIG_PATH = os.path.join(DATA_DIR, "test_config.yml")
+INPUTS = [
+    os.path.join(DATA_DIR, "ubs_valid.csv"),
+    os.path.join(DATA_DIR, "ubs_valid.csv"),
+    os.path.join(DATA_DIR, "ubs_cards_valid.csv"),
+]
+
+
+def make_run(tmp_path, run_id, dates):
+    data = pd.DataFrame(
+        {
+            "transaction_date": pd.to_datetime(dates),
+            "payee": [f"payee {run_id}"] * len(dates),
+        }
+    )
+    path = str(tmp_path / f"run_{run_id}.csv")
+    spill_run(data, path, run_id)
+    return path
+
+
+def test_merge_runs_is_sorted_with_intermediate_passes(tmp_path, monkeypatch):
+    monkeypatch.setattr(rebuild, "MERGE_FAN_IN", 2)
+    paths = [
+        make_run(tmp_path, 0, ["2024-01-05", "2024-01-01"]),
+        make_run(tmp_path, 1, ["2024-01-03"]),
+        make_run(tmp_path, 2, ["2024-01-02", "2024-01-04"]),
+    ]
+
+    rows = list(merge_runs(paths, 0, str(tmp_path)))
+
+    assert [row[0] for row in rows] == [
+        "2024-01-01",
+        "2024-01-02",
+        "2024-01-03",
+        "2024-01-04",
+        "2024-01-05",
+    ]
+
+
+def test_deduplicate_keeps_repeated_purchases():
+    rows = [
+        # date, payee, run
+        ["2024-01-01", "coffee", "0"],
+        ["2024-01-01", "coffee", "0"],
+        ["2024-01-01", "coffee", "1"],
+        ["2024-01-01", "bread", "1"],
+        ["2024-01-02", "coffee", "1"],
+    ]
+
+    kept = list(deduplicate(rows, 0, [0, 1], 2))
+
+    assert [row[:2] for row in kept] == [
+        ["2024-01-01", "coffee"],
+        ["2024-01-01", "coffee"],
+        ["2024-01-01", "bread"],
+        ["2024-01-02", "coffee"],
+    ]
+
+
+def test_rebuild_matches_incremental_output(tmp_path):
+    transformer = Transformer.from_file(CONFIG_PATH)
+    incremental_dir = tmp_path / "incremental"
+    rebuild_dir = tmp_path / "rebuild"
+
+    transformer.run(INPUTS, output_dir=str(incremental_dir))
+    summary = transformer.rebuild(INPUTS, str(rebuild_dir))
+
+    assert summary.files_processed == 3
+    assert sorted(os.listdir(rebuild_dir)) == sorted(os.listdir(incremental_dir))
+    for filename in os.listdir(rebuild_dir):
+        if not filename.endswith(".csv"):
+            continue
+        pd.testing.assert_frame_equal(
+            pd.read_csv(rebuild_dir / filename),
+            pd.read_csv(incremental_dir / filename),
+        )
+
+
+def test_rebuild_tags_transfers(tmp_path):
+    transformer = Transformer.from_file(CONFIG_PATH)
+    transformer.config["transfers"] = {"date_window_days": 3}
+    # Account side of the card bill payment of 73.05 made on 2023-01-10, listed
+    # first in the newest first export, followed by an older refund
+    with open(INPUTS[0], encoding="utf-8-sig") as f:
+        content = (
+            f.read()
+            .replace("1047.90", "1171.50")
+            .replace("période:;1;", "période:;2;")
+            .replace(
+                "2023-01-13;;2023-01-14;2023-01-13", "2023-01-11;;2023-01-11;2023-01-11"
+            )
+            .replace("-186.65", "-73.05")
+        )
+    content += (
+        "2023-01-05;;2023-01-05;2023-01-05;CHF;;10.00;;1244.55;9999;" '"Refund";;;;\n'
+    )
+    account_file = tmp_path / "ubs_bill_payment.csv"
+    account_file.write_text(content, encoding="utf-8")
+    output_dir = tmp_path / "output"
+
+    transformer.rebuild(
+        [str(account_file), str(account_file), INPUTS[2]], str(output_dir)
+    )
+
+    account = pd.read_csv(output_dir / "202301_ubs_CH4200120123A12345678.csv")
+    assert account["payee"].tolist() == ["Refund", "EXAMPLE; Paiement UBS TWINT"]
+    assert account["transfer_account"].fillna("").tolist() == [
+        "",
+        "ubs_cards_card_0123_12345678",
+    ]
+    card = pd.read_csv(output_dir / "202301_ubs_cards_card_0123_12345678.csv")
+    assert card["credit"].tolist() == [73.05]
+    assert card["transfer_account"].tolist() == ["ubs_CH4200120123A12345678"]
+    personal = pd.read_csv(output_dir / "202301_ubs_cards_personal_card.csv")
+    assert personal["transfer_account"].isna().all()
+
+
+def test_tag_transfers_only_holds_one_window():
+    consumed = []
+
+    def rows():
+        for day in range(1, 31):
+            consumed.append(day)
+            date = pd.Timestamp(2024, 1, day)
+            if day == 10:
+                yield date, "checking", ["to card"], -7305
+            elif day == 12:
+                yield date, "card", ["bill payment"], 7305
+            else:
+                yield date, "checking", [f"coffee {day}"], -450
+
+    tagged = tag_transfers(rows(), window_days=3)
+
+    first = next(tagged)
+    assert first == ("checking", ["coffee 1"], "")
+    assert len(consumed) == 5
+    tags = {row[0]: counterpart for _, row, counterpart in [first, *tagged]}
+    assert tags["to card"] == "card"
+    assert tags["bill payment"] == "checking"
+    assert sum(1 for counterpart in tags.values() if counterpart) == 2
+
+
+def make_account_file(tmp_path, name, replacements):
+    with open(INPUTS[0], encoding="utf-8-sig") as f:
+        content = f.read()
+    for old, new in replacements:
+        content = content.replace(old, new)
+    path = tmp_path / name
+    path.write_text(content, encoding="utf-8")
+    return str(path)
+
+
+def test_rebuild_reconciles_history_like_run(tmp_path):
+    transformer = Transformer.from_file(CONFIG_PATH)
+    # 47.90 went out of the account between both statements
+    march = make_account_file(
+        tmp_path,
+        "ubs_march.csv",
+        [
+            ("2023-01-01", "2023-03-01"),
+            ("2023-01-31", "2023-03-31"),
+            ("1234.55", "1000.00"),
+            ("1047.90", "950.00"),
+            ("2023-01-13;;2023-01-14;2023-01-13", "2023-03-13;;2023-03-14;2023-03-13"),
+            ("-186.65", "-50.00"),
+            ("1234563AB9269773", "1234563AB9269999"),
+        ],
+    )
+    inputs = [march, INPUTS[0], INPUTS[0]]
+
+    rebuilt = transformer.rebuild(inputs, str(tmp_path / "rebuild")).reconciliation
+    incremental = transformer.run(inputs).reconciliation
+
+    [balance_break] = rebuilt.breaks
+    assert balance_break.source == "history"
+    assert balance_break.difference == -4790
+    assert rebuilt.breaks == incremental.breaks
+    assert rebuilt.issues == incremental.issues == []
+    assert rebuilt.balances == incremental.balances
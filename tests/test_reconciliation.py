@@ -0,0 +1,174 @@
+# pylint: disable=missing-function-docstring,missing-module-docstring
+import os
+import pandas as pd
+from actual_budget_transformer import Transformer
+from actual_budget_transformer.processors.base_processor import ProcessingResult
+from actual_budget_transformer.reconciliation import (
+    BALANCES_FILE,
+    AccountBalance,
+    find_balance_breaks,
+    read_balances,
+    reconcile,
+    write_balances,
+)
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
+
+
+def make_ledger(rows):
+    ledger = pd.DataFrame(
+        rows, columns=["posting_date", "amount", "balance", "transaction_number"]
+    )
+    ledger["posting_date"] = pd.to_datetime(ledger["posting_date"])
+    ledger["balance"] = ledger["balance"].astype("Int64")
+    return ledger
+
+
+def make_result(source, start, opening, closing, rows):
+    statement = {
+        "source": source,
+        "start": pd.Timestamp(start),
+        "opening_balance": opening,
+        "closing_balance": closing,
+        "transaction_count": len(rows),
+        "ledger": make_ledger(rows),
+    }
+    return ProcessingResult(
+        data=pd.DataFrame(),
+        output_prefix="ubs_checking",
+        metadata={"statement": statement},
+    )
+
+
+def test_find_balance_breaks_reports_missing_row():
+    ledger = make_ledger(
+        [
+            ("2024-01-01", -1000, 9000, "T1"),
+            ("2024-01-02", -500, 8500, "T2"),
+            # A debit of 200 is missing here
+            ("2024-01-04", 300, 8600, "T4"),
+        ]
+    )
+
+    [balance_break] = find_balance_breaks(ledger, 10000, "ubs_checking", "jan.csv")
+
+    assert balance_break.transaction_number == "T4"
+    assert balance_break.expected_balance == 8800
+    assert balance_break.actual_balance == 8600
+    assert balance_break.difference == -200
+
+
+def test_find_balance_breaks_checks_opening_balance():
+    ledger = make_ledger([("2024-01-01", -1000, 9000, "T1")])
+    assert find_balance_breaks(ledger, 10000, "a", "f") == []
+    assert len(find_balance_breaks(ledger, 10500, "a", "f")) == 1
+
+
+def test_reconcile_orders_newest_first_exports():
+    result = make_result(
+        "jan.csv",
+        "2024-01-01",
+        10000,
+        8500,
+        [("2024-01-02", -500, 8500, "T2"), ("2024-01-01", -1000, 9000, "T1")],
+    )
+    assert reconcile([result]).ok
+
+
+def test_reconcile_finds_gap_between_overlapping_files():
+    january = make_result(
+        "jan.csv",
+        "2024-01-01",
+        10000,
+        8500,
+        [("2024-01-01", -1000, 9000, "T1"), ("2024-01-20", -500, 8500, "T2")],
+    )
+    overlap = make_result(
+        "jan_overlap.csv", "2024-01-15", 9000, 8500, [("2024-01-20", -500, 8500, "T2")]
+    )
+    # T3, a debit of 100 on 2024-02-05, is in none of the files
+    march = make_result(
+        "mar.csv", "2024-03-01", 8400, 8200, [("2024-03-10", -200, 8200, "T4")]
+    )
+
+    report = reconcile([march, overlap, january])
+
+    assert report.issues == []
+    [balance_break] = report.breaks
+    assert balance_break.source == "history"
+    assert balance_break.transaction_number == "T4"
+    assert balance_break.difference == -100
+
+
+def test_reconcile_flags_wrong_closing_balance():
+    result = make_result(
+        "jan.csv", "2024-01-01", 10000, 9500, [("2024-01-01", -1000, 9000, "T1")]
+    )
+    report = reconcile([result])
+    assert len(report.issues) == 1
+    assert "closing balance is 95.00" in report.issues[0]
+
+
+def test_run_reconciles_ubs_statement():
+    transformer = Transformer.from_file(os.path.join(DATA_DIR, "test_config.yml"))
+    summary = transformer.run([os.path.join(DATA_DIR, "ubs_valid.csv")])
+    assert summary.reconciliation.accounts == ["ubs_CH4200120123A12345678"]
+    assert summary.reconciliation.ok
+
+
+def test_reconcile_checks_continuity_with_previous_runs():
+    previous = {"ubs_checking": AccountBalance(pd.Timestamp("2024-01-20"), "T2", 8500)}
+    # T3, a debit of 100 on 2024-02-05, was never ingested
+    march = make_result(
+        "mar.csv", "2024-03-01", 8400, 8200, [("2024-03-10", -200, 8200, "T4")]
+    )
+
+    report = reconcile([march], previous)
+
+    [balance_break] = report.breaks
+    assert balance_break.source == "previous runs"
+    assert balance_break.transaction_number == "T4"
+    assert balance_break.difference == -100
+    assert report.balances["ubs_checking"].transaction_number == "T4"
+
+
+def test_reconcile_accepts_overlap_with_previous_runs():
+    previous = {"ubs_checking": AccountBalance(pd.Timestamp("2024-01-20"), "T2", 8500)}
+    overlap = make_result(
+        "jan_feb.csv",
+        "2024-01-15",
+        9000,
+        8400,
+        [("2024-01-20", -500, 8500, "T2"), ("2024-02-05", -100, 8400, "T3")],
+    )
+    older = make_result(
+        "dec.csv", "2023-12-01", 9100, 9000, [("2023-12-10", -100, 9000, "T0")]
+    )
+
+    assert reconcile([overlap], previous).ok
+    # Reprocessing older files does not move the last balance back
+    report = reconcile([older], previous)
+    assert report.ok
+    assert report.balances == previous
+
+
+def test_run_persists_last_balance(tmp_path):
+    transformer = Transformer.from_file(os.path.join(DATA_DIR, "test_config.yml"))
+    valid_file = os.path.join(DATA_DIR, "ubs_valid.csv")
+    balances_path = str(tmp_path / BALANCES_FILE)
+
+    assert transformer.run([valid_file], output_dir=str(tmp_path)).reconciliation.ok
+    [(account, balance)] = read_balances(balances_path).items()
+    assert balance.balance == 104790
+
+    # A previous run ending on another balance leaves a gap before this file
+    write_balances(
+        balances_path,
+        {account: AccountBalance(pd.Timestamp("2022-12-31"), "T0", 100000)},
+    )
+    summary = transformer.run([valid_file], output_dir=str(tmp_path))
+
+    [balance_break] = summary.reconciliation.breaks
+    assert balance_break.source == "previous runs"
+    assert balance_break.difference == 23455
+    assert read_balances(balances_path)[account].balance == 104790
@@ -0,0 +1,99 @@
+# pylint: disable=missing-function-docstring,missing-module-docstring
+import time
+import pandas as pd
+from actual_budget_transformer.processors.base_processor import ProcessingResult
+from actual_budget_transformer.transfers import (
+    TransferMatcher,
+    find_transfers,
+    match_transfers,
+)
+
+
+def make_result(prefix, rows):
+    data = pd.DataFrame(
+        rows, columns=["transaction_date", "payee", "notes", "debit", "credit"]
+    )
+    data["transaction_date"] = pd.to_datetime(data["transaction_date"])
+    return ProcessingResult(data=data, output_prefix=prefix)
+
+
+def test_find_transfers_pairs_closest_opposite_amount_in_window():
+    keys = pd.DataFrame(
+        {
+            "account": ["a", "b", "b", "a", "c"],
+            "date": pd.to_datetime(
+                ["2024-01-01", "2024-01-02", "2024-01-20", "2024-01-10", "2024-01-11"]
+            ),
+            "amount": [-10000, 10000, 10000, 500, 500],
+        }
+    )
+
+    counterparts = find_transfers(keys, window_days=3)
+
+    assert counterparts.tolist()[:2] == ["b", "a"]
+    # Out of window, and same sign on both sides
+    assert counterparts.iloc[2:].isna().all()
+
+
+def test_find_transfers_ignores_same_account():
+    keys = pd.DataFrame(
+        {
+            "account": ["a", "a"],
+            "date": pd.to_datetime(["2024-01-01", "2024-01-01"]),
+            "amount": [-2500, 2500],
+        }
+    )
+    assert find_transfers(keys, window_days=3).isna().all()
+
+
+def test_match_transfers_tags_overlapping_files_once():
+    january = make_result(
+        "ubs_checking",
+        [
+            ("2024-01-05", "To savings", "", -500.0, None),
+            ("2024-01-06", "Coffee", "", -4.5, None),
+        ],
+    )
+    overlap = make_result(
+        "ubs_checking", [("2024-01-05", "To savings", "", -500.0, None)]
+    )
+    savings = make_result(
+        "ubs_savings", [("2024-01-06", "From checking", "", None, 500.0)]
+    )
+
+    match_transfers([january, overlap, savings], window_days=3)
+
+    assert january.data["transfer_account"].tolist() == ["ubs_savings", ""]
+    assert overlap.data["transfer_account"].tolist() == ["ubs_savings"]
+    assert savings.data["transfer_account"].tolist() == ["ubs_checking"]
+
+
+def test_find_transfers_stays_linear_on_repeated_amounts():
+    count = 40000
+    keys = pd.DataFrame(
+        {
+            "account": ["a", "b"] * (count // 2),
+            "date": pd.Timestamp("2024-01-01")
+            + pd.to_timedelta([index // 100 for index in range(count)], unit="D"),
+            "amount": [-500] * (count - 1) + [500],
+        }
+    )
+
+    start = time.perf_counter()
+    counterparts = find_transfers(keys, window_days=3)
+    elapsed = time.perf_counter() - start
+
+    # The single credit of account b pairs with the latest debit of account a
+    assert counterparts.notna().sum() == 2
+    assert counterparts.iloc[-1] == "a"
+    assert counterparts.iloc[-2] == "b"
+    # Scanning pending transactions took minutes here
+    assert elapsed < 10
+
+
+def test_matcher_expires_transactions_out_of_window():
+    matcher = TransferMatcher(window_days=3)
+    assert matcher.add(0, "a", pd.Timestamp("2024-01-01"), -500) is None
+    assert matcher.add(1, "a", pd.Timestamp("2024-01-03"), -500) is None
+    assert matcher.add(2, "b", pd.Timestamp("2024-01-05"), 500) == (1, "a")
+    assert matcher.add(3, "b", pd.Timestamp("2024-01-05"), 500) is None
@@ -0,0 +1,116 @@
+# pylint: disable=missing-function-docstring,missing-module-docstring
+import copy
+import io
+import os
+import pandas as pd
+from actual_budget_transformer import InMemoryFile, Transformer
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
+CONFIG_PATH = os.path.join(DATA_DIR, "test_config.yml")
+VALID_FILE = os.path.join(DATA_DIR, "ubs_valid.csv")
+
+
+def test_process_path_bytes_and_file_object():
+    transformer = Transformer.from_file(CONFIG_PATH)
+    with open(VALID_FILE, "rb") as f:
+        content = f.read()
+
+    [from_path] = transformer.process(VALID_FILE)
+    [from_bytes] = transformer.process(content, name="ubs_valid.csv")
+    with open(VALID_FILE, "rb") as f:
+        [from_stream] = transformer.process(f)
+
+    assert from_path.output_prefix == "ubs_CH4200120123A12345678"
+    pd.testing.assert_frame_equal(from_path.data, from_bytes.data)
+    pd.testing.assert_frame_equal(from_path.data, from_stream.data)
+
+
+def test_instances_keep_their_own_config():
+    default = Transformer.from_file(CONFIG_PATH)
+    config = copy.deepcopy(default.config)
+    config["processors"]["ubs_csv"]["account_names"] = {
+        "CH4200120123A12345678": "checking"
+    }
+    renamed = Transformer(config)
+
+    assert renamed.process(VALID_FILE)[0].output_prefix == "ubs_checking"
+    assert default.process(VALID_FILE)[0].output_prefix != "ubs_checking"
+
+
+def test_run_skips_unsupported_and_saves(tmp_path):
+    transformer = Transformer.from_file(CONFIG_PATH)
+    unsupported = os.path.join(DATA_DIR, "ubs_invalid_header.csv")
+
+    summary = transformer.run([VALID_FILE, unsupported], output_dir=str(tmp_path))
+
+    assert summary.files_processed == 1
+    assert [name for name, _ in summary.files_skipped] == [unsupported]
+    assert summary.saved[0].files_created == ["202301_ubs_CH4200120123A12345678.csv"]
+    saved = pd.read_csv(tmp_path / "202301_ubs_CH4200120123A12345678.csv")
+    assert saved["debit"].tolist() == [-186.65]
+
+
+def test_run_in_memory_inputs(tmp_path):
+    transformer = Transformer.from_file(CONFIG_PATH)
+    with open(VALID_FILE, "rb") as f:
+        content = f.read()
+
+    summary = transformer.run(
+        [
+            InMemoryFile("january.csv", content),
+            ("january_bytes.csv", content),
+            ("january_stream.csv", io.BytesIO(content)),
+        ],
+        output_dir=str(tmp_path),
+    )
+
+    assert summary.files_processed == 3
+    assert summary.files_skipped == []
+    saved = pd.read_csv(tmp_path / "202301_ubs_CH4200120123A12345678.csv")
+    assert saved["debit"].tolist() == [-186.65]
+
+
+def test_run_again_with_new_payee_rule_updates_saved_transactions(tmp_path):
+    cards_file = os.path.join(DATA_DIR, "ubs_cards_valid.csv")
+    output_file = tmp_path / "202301_ubs_cards_personal_card.csv"
+    Transformer.from_file(CONFIG_PATH).run([cards_file], output_dir=str(tmp_path))
+
+    transformer = Transformer.from_file(CONFIG_PATH)
+    transformer.config["payee_rules"] = [
+        {"match": "coop", "payee": "Coop", "category": "Groceries"}
+    ]
+    transformer = Transformer(transformer.config)
+    for _ in range(2):
+        summary = transformer.run([cards_file], output_dir=str(tmp_path))
+
+    saved = pd.read_csv(output_file)
+    assert saved["payee"].tolist() == ["Coop", "MIGROS ZURICH"]
+    assert saved["original_payee"].tolist() == ["COOP-1234 BERN", "MIGROS ZURICH"]
+    assert saved["category"].fillna("").tolist() == ["Groceries", ""]
+    assert summary.saved[0].new_transactions_by_month == {"202301": 0}
+
+
+def test_run_tags_transfers_on_saved_transactions(tmp_path):
+    config = Transformer.from_file(CONFIG_PATH).config
+    config["transfers"] = {"date_window_days": 3}
+    transformer = Transformer(config)
+    # Account side of the card bill payment of 73.05 made on 2023-01-10
+    with open(VALID_FILE, encoding="utf-8-sig") as f:
+        content = (
+            f.read()
+            .replace("1047.90", "1161.50")
+            .replace("2023-01-13;;2023-01-14", "2023-01-11;;2023-01-11")
+            .replace("-186.65", "-73.05")
+        )
+    account_file = ("ubs_bill_payment.csv", content.encode("utf-8"))
+    cards_file = os.path.join(DATA_DIR, "ubs_cards_valid.csv")
+
+    transformer.run([account_file], output_dir=str(tmp_path))
+    transformer.run([account_file, cards_file], output_dir=str(tmp_path))
+    # A later run without the card keeps the tag found before
+    transformer.run([account_file], output_dir=str(tmp_path))
+
+    account = pd.read_csv(tmp_path / "202301_ubs_CH4200120123A12345678.csv")
+    assert account["transfer_account"].tolist() == ["ubs_cards_card_0123_12345678"]
+    card = pd.read_csv(tmp_path / "202301_ubs_cards_card_0123_12345678.csv")
+    assert card["transfer_account"].tolist() == ["ubs_CH4200120123A12345678"]
@@ -0,0 +1,51 @@
+# pylint: disable=missing-function-docstring,missing-module-docstring
+import os
+from actual_budget_transformer.config import read_config
+from actual_budget_transformer.processors.ubs_cards_csv_transaction_processor import (
+    UBSCardsCSVTransactionProcessor,
+)
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
+CONFIG = read_config(os.path.join(DATA_DIR, "test_config.yml"))
+
+
+def test_can_process_valid_ubs_cards_csv():
+    file_path = os.path.join(DATA_DIR, "ubs_cards_valid.csv")
+    assert UBSCardsCSVTransactionProcessor.can_process(file_path, CONFIG) is True
+
+
+def test_can_process_ubs_account_csv():
+    file_path = os.path.join(DATA_DIR, "ubs_valid.csv")
+    assert UBSCardsCSVTransactionProcessor.can_process(file_path, CONFIG) is False
+
+
+def test_process_splits_statement_by_card():
+    file_path = os.path.join(DATA_DIR, "ubs_cards_valid.csv")
+    results = UBSCardsCSVTransactionProcessor(CONFIG).process(file_path)
+
+    by_prefix = {result.output_prefix: result.data for result in results}
+    assert list(by_prefix) == [
+        "ubs_cards_personal_card",
+        "ubs_cards_card_1234_56xx_xxxx_2222",
+        "ubs_cards_card_0123_12345678",
+    ]
+    personal = by_prefix["ubs_cards_personal_card"]
+    assert personal["payee"].tolist() == ["COOP-1234 BERN", "MIGROS ZURICH"]
+    assert personal["transaction_date"].dt.day.tolist() == [3, 7]
+    assert by_prefix["ubs_cards_card_0123_12345678"]["credit"].tolist() == [73.05]
+
+
+def test_process_keeps_rows_without_card_or_account_number(tmp_path):
+    with open(
+        os.path.join(DATA_DIR, "ubs_cards_valid.csv"), encoding="iso-8859-1"
+    ) as f:
+        content = f.read()
+    content += ";;;15.01.2023;Cotisation annuelle;;;;;CHF;50.00;;15.01.2023\n"
+    file_path = tmp_path / "ubs_cards_fee.csv"
+    file_path.write_text(content, encoding="iso-8859-1")
+
+    results = UBSCardsCSVTransactionProcessor(CONFIG).process(str(file_path))
+
+    assert sum(len(result.data) for result in results) == 5
+    assert results[-1].output_prefix == "ubs_cards_card_unknown"
+    assert results[-1].data["debit"].tolist() == [50.0]
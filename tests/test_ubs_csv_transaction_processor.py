@@ -1,6 +1,8 @@
 # pylint: disable=missing-function-docstring,missing-module-docstring
 import os
+from actual_budget_transformer.config import read_config
 from actual_budget_transformer.processors.ubs_csv_transaction_processor import (
+    HEADER_FIELDS,
     UBSCSVTransactionProcessor,
 )
 
@@ -33,3 +35,27 @@ def test_can_process_invalid_transaction_columns():
 def test_can_process_invalid_encoding():
     file_path = os.path.join(DATA_DIR, "ubs_invalid_encoding.csv")
     assert UBSCSVTransactionProcessor.can_process(file_path) is False
+
+
+def test_process_reads_header_values_by_label(tmp_path):
+    config = read_config(os.path.join(DATA_DIR, "test_config.yml"))
+    labels = config["processors"]["ubs_csv"]["expected_header_labels"]
+    fields = dict(zip(HEADER_FIELDS, labels))
+    # Same labels, listed in another order
+    config["processors"]["ubs_csv"]["expected_header_labels"] = dict(
+        reversed(fields.items())
+    )
+    with open(os.path.join(DATA_DIR, "ubs_valid.csv"), encoding="utf-8-sig") as f:
+        lines = f.read().splitlines()
+    # Closing balance listed before opening balance
+    lines[4], lines[5] = lines[5], lines[4]
+    file_path = tmp_path / "ubs_swapped.csv"
+    file_path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+    assert UBSCSVTransactionProcessor.can_process(str(file_path), config) is True
+    [result] = UBSCSVTransactionProcessor(config).process(str(file_path))
+
+    statement = result.metadata["statement"]
+    assert statement["opening_balance"] == 123455
+    assert statement["closing_balance"] == 104790
+    assert statement["transaction_count"] == 1